@@ -0,0 +1,43 @@
+import random
+import sys
+import timeit
+
+from block_markdown import (
+    markdown_to_blocks,
+    block_to_block_type,
+    scan_markdown,
+)
+from corpus import make_markdown
+from markdown import extract_title
+
+def split_pipeline(markdown):
+    title = extract_title(markdown)
+    blocks = [
+        (block, block_to_block_type(block))
+        for block in markdown_to_blocks(markdown)
+    ]
+    return title, blocks
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    repeat = 5
+
+    rng = random.Random(42)
+    markdown = make_markdown(rng, int(size_mb * 1024 * 1024))
+
+    if split_pipeline(markdown) != scan_markdown(markdown):
+        raise AssertionError("Block scanner output differs")
+
+    print(f"{len(markdown) / 1024 / 1024:.1f} MB of markdown")
+
+    for name, func in (("split + classify", split_pipeline),
+                       ("line scanner", scan_markdown)):
+        elapsed = min(
+            timeit.repeat(lambda: func(markdown), number=1, repeat=repeat)
+        )
+        print(f"  {name:17} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
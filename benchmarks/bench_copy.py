@@ -0,0 +1,56 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from copy_static import COPY_STRATEGIES, copy_file, copy_files_recursive
+
+
+def make_tree(root, file_count, file_size):
+    rng = random.Random(42)
+    for i in range(file_count):
+        directory = os.path.join(root, f"dir-{i % 50}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"asset-{i}.bin"), "wb") as f:
+            f.write(rng.randbytes(file_size))
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    file_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64 * 1024
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    with tempfile.TemporaryDirectory(dir=".") as root:
+        source = os.path.join(root, "static")
+        dest = os.path.join(root, "docs")
+        make_tree(source, file_count, file_size)
+        print(f"{file_count} files of {file_size // 1024} kB")
+
+        # Which method each strategy ends up using on this filesystem
+        sample = os.path.join(source, "dir-0", "asset-0.bin")
+        for strategy in COPY_STRATEGIES:
+            used = copy_file(sample, os.path.join(root, "sample"), strategy)
+            print(f"  {strategy:9} copies with {used}")
+
+        for strategy in COPY_STRATEGIES:
+            for worker_count in (1, workers):
+                shutil.rmtree(dest, ignore_errors=True)
+                start = time.perf_counter()
+                with open(os.devnull, "w") as devnull:
+                    with redirect_stdout(devnull):
+                        copy_files_recursive(
+                            source,
+                            dest,
+                            strategy=strategy,
+                            workers=worker_count,
+                        )
+                elapsed = time.perf_counter() - start
+                print(f"  {strategy:9} {worker_count:2} workers: "
+                      f"{elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
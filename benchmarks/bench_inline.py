@@ -0,0 +1,43 @@
+import random
+import sys
+import timeit
+
+from corpus import make_paragraph
+from inline_markdown import text_to_textnodes, text_to_textnodes_multipass
+
+
+def bench(func, texts, repeat):
+    return min(
+        timeit.repeat(
+            lambda: [func(text) for text in texts],
+            number=1,
+            repeat=repeat,
+        )
+    )
+
+
+def main():
+    paragraph_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    word_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    repeat = 5
+
+    rng = random.Random(42)
+    texts = [make_paragraph(rng, word_count) for _ in range(paragraph_count)]
+
+    for text in texts:
+        if text_to_textnodes(text) != text_to_textnodes_multipass(text):
+            raise AssertionError(f"Tokenizer output differs for: {text!r}")
+
+    total_chars = sum(len(text) for text in texts)
+    print(f"{paragraph_count} paragraphs, {total_chars} characters")
+
+    multipass = bench(text_to_textnodes_multipass, texts, repeat)
+    single_pass = bench(text_to_textnodes, texts, repeat)
+
+    print(f"  multi-pass:  {multipass * 1000:8.1f} ms")
+    print(f"  single-pass: {single_pass * 1000:8.1f} ms")
+    print(f"  speedup:     {multipass / single_pass:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from corpus import make_corpus
+from generate_html import generate_pages_recursive
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    max_jobs = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path = make_corpus(root, page_count, page_size)
+        build_dir = os.path.join(root, "docs")
+        print(f"{page_count} pages of ~{page_size // 1000} kB, "
+              f"{os.cpu_count()} CPUs")
+
+        # Progress lines would dominate the timings
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        results = []
+        jobs = 1
+        while jobs <= max_jobs:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            start = time.perf_counter()
+            generate_pages_recursive(
+                content_dir,
+                template_path,
+                build_dir,
+                "/",
+                jobs=jobs,
+            )
+            results.append((jobs, time.perf_counter() - start))
+            jobs *= 2
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    serial = results[0][1]
+    for jobs, elapsed in results:
+        print(f"  {jobs:3} jobs: {elapsed:7.2f} s  "
+              f"speedup {serial / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
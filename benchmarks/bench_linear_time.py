@@ -0,0 +1,112 @@
+# Usage: PYTHONPATH=src python3 benchmarks/bench_linear_time.py [size]
+# Exits with an error when a parser slows down faster than its input grows
+import sys
+import timeit
+
+from block_handlers import clear_inline_cache
+from inline_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    text_to_textnodes,
+)
+from markdown import markdown_to_html_node
+
+# Growing an input 8 times takes about 8 times as long in linear time and
+# 64 times as long in quadratic time; the limit leaves room for noise
+GROWTH = 8
+MAX_SLOWDOWN = 24
+
+PATHOLOGICAL_INLINE = {
+    "unmatched brackets": "[",
+    "unmatched image brackets": "![",
+    "bracketed words": "[a",
+    "unclosed links": "[a](",
+    "bracket parens": "](",
+    "nested brackets": "[[]]((",
+    "bang runs": "!",
+    "asterisk runs": "**",
+    "italic words": "a*",
+    "unclosed bold": "**a",
+    "underscores": "__",
+    "backticks": "``",
+    "mixed delimiters": "*_`**[!](",
+    "huge line": "word ",
+}
+
+PATHOLOGICAL_BLOCKS = {
+    "newlines": lambda count: "\n" * count,
+    "whitespace": lambda count: " " * count,
+    "quote lines": lambda count: "> a\n" * count,
+    "list lines": lambda count: "- a\n" * count,
+    "broken ordered list": lambda count: "".join(
+        f"{i + 1}. a\n" for i in range(count // 8)
+    ) + "0. a",
+    "hashes": lambda count: "#" * count,
+    "fences": lambda count: "```\n" * count,
+    "paragraph lines": lambda count: "a *b*\n" * count,
+}
+
+
+def run(func, text):
+    try:
+        func(text)
+    except ValueError:
+        # Malformed markup is rejected, but must be rejected quickly
+        pass
+
+
+def best_time(func, text, repeat):
+    return min(
+        timeit.repeat(
+            lambda: run(func, text),
+            setup=clear_inline_cache,
+            number=1,
+            repeat=repeat,
+        )
+    )
+
+
+def slowdown(func, make_text, count, repeat):
+    small = best_time(func, make_text(count), repeat)
+    large = best_time(func, make_text(count * GROWTH), repeat)
+    return large / max(small, 1e-4)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    repeat = 5
+
+    cases = []
+    for name, unit in PATHOLOGICAL_INLINE.items():
+        count = size // len(unit)
+        for func in (
+                text_to_textnodes,
+                extract_markdown_images,
+                extract_markdown_links):
+            cases.append((
+                f"{func.__name__}: {name}",
+                func,
+                lambda n, unit=unit: unit * n,
+                count,
+            ))
+    for name, make_body in PATHOLOGICAL_BLOCKS.items():
+        cases.append((
+            f"markdown_to_html_node: {name}",
+            markdown_to_html_node,
+            lambda n, make_body=make_body: "# Title\n\n" + make_body(n),
+            size // 4,
+        ))
+
+    print(f"Slowdown for {GROWTH}x the input, limit {MAX_SLOWDOWN}x")
+    failures = []
+    for name, func, make_text, count in cases:
+        ratio = slowdown(func, make_text, count, repeat)
+        print(f"  {name:50} {ratio:6.1f}x")
+        if ratio > MAX_SLOWDOWN:
+            failures.append(name)
+    if failures:
+        sys.exit(f"Superlinear: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# Usage: PYTHONPATH=src:benchmarks python3 benchmarks/bench_suite.py [options]
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+
+import main as site
+from block_handlers import clear_inline_cache
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks
+from corpus import DEFAULT_MIX, make_corpus
+from inline_markdown import text_to_textnodes
+from markdown import markdown_to_html_node
+
+STAGES = (
+    "text_to_textnodes",
+    "block_to_block_type",
+    "markdown_to_html_node",
+    "to_html",
+    "build",
+)
+DEFAULT_BASELINE_PATH = "benchmarks/baseline.json"
+DEFAULT_RESULTS_PATH = ".cache/bench-results.json"
+# A stage fails when it is more than this fraction slower than the baseline
+DEFAULT_THRESHOLD = 0.2
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Time each build stage on a generated corpus"
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="relative block weights, e.g. heading=1,code=2,paragraph=5",
+    )
+    parser.add_argument(
+        "--inline-density",
+        type=float,
+        default=0.1,
+        help="fraction of words wrapped in inline markup (default: 0.1)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGES,
+        default=list(STAGES),
+    )
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slowdown against the baseline (default: 0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--stage-threshold",
+        action="append",
+        default=[],
+        metavar="STAGE=RATIO",
+        help="allowed slowdown for one stage, overriding --threshold",
+    )
+    return parser.parse_args()
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        block_type, _, weight = item.partition("=")
+        if block_type not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(
+                f"unknown block type '{block_type}', "
+                f"expected one of {', '.join(DEFAULT_MIX)}"
+            )
+        try:
+            mix[block_type] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight in '{item}'")
+    return mix
+
+
+def stage_thresholds(args):
+    thresholds = dict.fromkeys(STAGES, args.threshold)
+    for item in args.stage_threshold:
+        stage, _, ratio = item.partition("=")
+        if stage not in thresholds:
+            sys.exit(f"Unknown stage '{stage}' in --stage-threshold")
+        thresholds[stage] = float(ratio)
+    return thresholds
+
+
+def load_pages(content_dir):
+    pages = []
+    for directory, _, files in sorted(os.walk(content_dir)):
+        for name in sorted(files):
+            with open(os.path.join(directory, name), "r") as f:
+                pages.append(f.read())
+    return pages
+
+
+def time_stage(stage, root, pages, repeat):
+    setup = "pass"
+    if stage == "text_to_textnodes":
+        texts = [
+            block
+            for page in pages
+            for block in markdown_to_blocks(page)
+            if block_to_block_type(block) == BlockType.PARAGRAPH
+        ]
+        run = lambda: [text_to_textnodes(text) for text in texts]
+    elif stage == "block_to_block_type":
+        blocks = [
+            block for page in pages for block in markdown_to_blocks(page)
+        ]
+        run = lambda: [block_to_block_type(block) for block in blocks]
+    elif stage == "markdown_to_html_node":
+        # Every repeat has to tokenize inline text from scratch
+        setup = clear_inline_cache
+        run = lambda: [markdown_to_html_node(page) for page in pages]
+    elif stage == "to_html":
+        nodes = [markdown_to_html_node(page) for page in pages]
+        run = lambda: [node.to_html() for node in nodes]
+    else:
+        setup = lambda: prepare_build(root)
+        run = lambda: run_build(root)
+    return min(timeit.repeat(run, setup, number=1, repeat=repeat))
+
+
+def prepare_build(root):
+    clear_inline_cache()
+    shutil.rmtree(os.path.join(root, ".cache"), ignore_errors=True)
+
+
+def run_build(root):
+    # main works relative to the site root and reads its options from argv
+    cwd, argv = os.getcwd(), sys.argv
+    os.chdir(root)
+    sys.argv = ["main.py", "--clean"]
+    try:
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                site.main()
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+
+
+def compare(results, baseline, thresholds):
+    if baseline["config"] != results["config"]:
+        print("Baseline was recorded with a different corpus, not comparing")
+        return []
+
+    regressions = []
+    for stage, seconds in results["stages"].items():
+        base = baseline["stages"].get(stage)
+        if not base:
+            continue
+        change = seconds / base - 1
+        failed = change > thresholds[stage]
+        print(f"  {stage:22} {change:+7.1%} vs baseline "
+              f"(limit {thresholds[stage]:+.0%}){'  REGRESSION' * failed}")
+        if failed:
+            regressions.append(stage)
+    return regressions
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+
+def main():
+    args = parse_args()
+    thresholds = stage_thresholds(args)
+    config = {
+        "pages": args.pages,
+        "page_size": args.page_size,
+        "seed": args.seed,
+        "mix": args.mix,
+        "inline_density": args.inline_density,
+    }
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, _ = make_corpus(
+            root,
+            args.pages,
+            args.page_size,
+            args.seed,
+            args.mix,
+            args.inline_density,
+        )
+        pages = load_pages(content_dir)
+        print(f"{len(pages)} pages, "
+              f"{sum(map(len, pages)) / 1024 / 1024:.1f} MB of markdown")
+
+        stages = {}
+        for stage in args.stages:
+            stages[stage] = time_stage(stage, root, pages, args.repeat)
+            print(f"  {stage:22} {stages[stage] * 1000:9.1f} ms")
+
+    results = {
+        "python": f"{platform.python_implementation()} "
+                  f"{platform.python_version()}",
+        "config": config,
+        "stages": stages,
+    }
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline")
+        return
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, thresholds)
+    if regressions:
+        sys.exit(f"Regressed past threshold: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import random
+
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "elvish", "hobbit",
+         "ring", "mountain", "river", "shadow", "fellowship"]
+INLINE_MARKUP = [
+    "**{}**",
+    "*{}*",
+    "_{}_",
+    "`{}`",
+    "[{}](https://example.com/page)",
+    "![{}](/images/picture.png)",
+]
+
+# Relative weight of each block type in generated pages
+DEFAULT_MIX = {
+    "heading": 0.1,
+    "code": 0.1,
+    "quote": 0.1,
+    "ulist": 0.15,
+    "olist": 0.1,
+    "paragraph": 0.45,
+}
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+def make_paragraph(rng, word_count, inline_density=0.1):
+    words = []
+    for _ in range(word_count):
+        word = rng.choice(WORDS)
+        if inline_density and rng.random() < inline_density:
+            word = rng.choice(INLINE_MARKUP).format(word)
+        words.append(word)
+    return " ".join(words)
+
+
+def make_block(rng, mix=DEFAULT_MIX, inline_density=0.0):
+    words = lambda count: make_paragraph(rng, count, inline_density)
+    kind = rng.random() * sum(mix.values())
+    for block_type, weight in mix.items():
+        if kind < weight:
+            break
+        kind -= weight
+
+    if block_type == "heading":
+        return "#" * rng.randint(1, 6) + " " + words(5)
+    if block_type == "code":
+        code = (make_paragraph(rng, 6, 0) for _ in range(8))
+        return "```\n" + "\n".join(code) + "\n```"
+    if block_type == "quote":
+        return "\n".join("> " + words(10) for _ in range(3))
+    if block_type == "ulist":
+        return "\n".join("- " + words(6) for _ in range(6))
+    if block_type == "olist":
+        return "\n".join(f"{i + 1}. " + words(6) for i in range(6))
+    return "\n".join(words(12) for _ in range(4))
+
+
+def make_markdown(rng, size, mix=DEFAULT_MIX, inline_density=0.0):
+    blocks = ["# Generated reference page"]
+    length = len(blocks[0])
+    while length < size:
+        block = make_block(rng, mix, inline_density)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def make_corpus(
+        root,
+        page_count,
+        page_size,
+        seed=42,
+        mix=DEFAULT_MIX,
+        inline_density=0.0):
+    # Lays out a site like the real one: content/, static/ and a template
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    for i in range(page_count):
+        page_dir = os.path.join(content_dir, f"section-{i % 20}", f"page-{i}")
+        os.makedirs(page_dir)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(make_markdown(rng, page_size, mix, inline_density))
+
+    static_dir = os.path.join(root, "static")
+    os.makedirs(static_dir, exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write(TEMPLATE)
+    return content_dir, template_path
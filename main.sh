@@ -1,2 +1,4 @@
-python3 src/main.py
-cd public && python3 -m http.server 8888
+python3 src/main.py --watch &
+# Wait for the watcher so it can save its render cache before exiting
+trap 'kill $!; wait $!' EXIT
+python3 -m http.server 8888 --directory docs
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from generate_html import (
+    generate_page_streaming,
+    read_page_source,
+    render_page,
+    write_file,
+)
+from template import load_template
+
+READ_AHEAD = 16
+WRITE_BEHIND = 16
+IO_WORKERS = 8
+
+
+class PipelineStats:
+    def __init__(self):
+        self.pages = 0
+        self.outputs = Counter()
+        self.elapsed = 0.0
+        self.render_time = 0.0
+        # Renderer waiting for a read to finish, or for room to queue a
+        # write, means the build is waiting on storage
+        self.read_wait = 0.0
+        self.write_wait = 0.0
+        # Reader waiting for room to queue means storage is ahead
+        self.reader_stall = 0.0
+        self.read_depths = []
+        self.write_depths = []
+
+    @property
+    def io_bound(self):
+        return self.read_wait + self.write_wait > self.render_time
+
+    def report(self):
+        bound = "I/O-bound" if self.io_bound else "CPU-bound"
+        return (
+            f"Async I/O: {self.pages} pages in {self.elapsed:.2f}s, "
+            f"{self.render_time:.2f}s rendering ({bound})\n"
+            f"  read queue depth: {depth_summary(self.read_depths)}\n"
+            f"  write queue depth: {depth_summary(self.write_depths)}\n"
+            f"  renderer waited {self.read_wait:.2f}s for reads and "
+            f"{self.write_wait:.2f}s for writes, "
+            f"reader stalled {self.reader_stall:.2f}s"
+        )
+
+
+def depth_summary(depths):
+    if not depths:
+        return "n/a"
+    return f"avg {sum(depths) / len(depths):.1f}, max {max(depths)}"
+
+
+def generate_pages_async(
+        tasks,
+        render_cache=None,
+        read_ahead=READ_AHEAD,
+        write_behind=WRITE_BEHIND,
+        io_workers=IO_WORKERS):
+    stats = PipelineStats()
+    start = time.perf_counter()
+    asyncio.run(
+        run_pipeline(
+            tasks,
+            render_cache,
+            stats,
+            read_ahead,
+            write_behind,
+            io_workers,
+        )
+    )
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+async def run_pipeline(
+        tasks,
+        render_cache,
+        stats,
+        read_ahead,
+        write_behind,
+        io_workers):
+    loop = asyncio.get_running_loop()
+    reads = asyncio.Queue(maxsize=read_ahead)
+    writes = asyncio.Queue(maxsize=write_behind)
+
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool:
+        async def read_pages():
+            for task in tasks:
+                read = loop.run_in_executor(io_pool, read_page_source, task[0])
+                start = time.perf_counter()
+                await reads.put((task, read))
+                stats.reader_stall += time.perf_counter() - start
+            await reads.put(None)
+
+        async def render_pages():
+            while True:
+                start = time.perf_counter()
+                item = await reads.get()
+                if item is None:
+                    break
+                task, read = item
+                markdown = await read
+                stats.read_wait += time.perf_counter() - start
+                stats.read_depths.append(reads.qsize())
+
+                # Rendering runs on the event loop thread while reads and
+                # writes for other pages continue in the I/O threads
+                start = time.perf_counter()
+                source_path, template_path, dest_path, basepath, assets = task
+                template = load_template(template_path, basepath, assets)
+                if markdown is None:
+                    write = generate_page_streaming(
+                        source_path,
+                        template,
+                        dest_path,
+                    )
+                else:
+                    html = render_page(markdown, template, render_cache)
+                    write = loop.run_in_executor(
+                        io_pool,
+                        write_file,
+                        dest_path,
+                        html,
+                    )
+                stats.render_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                await writes.put((task, write))
+                stats.write_wait += time.perf_counter() - start
+                stats.write_depths.append(writes.qsize())
+            await writes.put(None)
+
+        async def finish_writes():
+            while True:
+                item = await writes.get()
+                if item is None:
+                    break
+                task, write = item
+                # Streamed pages are already written and hold the result
+                output = write if isinstance(write, str) else await write
+                print(f" * {task[0]} -> {task[2]}")
+                stats.pages += 1
+                stats.outputs[output] += 1
+
+        await asyncio.gather(read_pages(), render_pages(), finish_writes())
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from block_markdown import BlockType
 from inline_markdown import text_to_textnodes
 from parentnode import ParentNode
@@ -47,12 +49,73 @@ def list_block_to_html_node(block, list_tag):
     return ParentNode(list_tag, list_nodes)
 
 
+INLINE_CACHE_SIZE = 4096
+
+
 def text_to_children(text):
+    return list(_cached_text_to_children(text))
+
+
+def build_text_children(text):
     text_nodes = text_to_textnodes(text)
-    return [
+    return tuple(
         text_node_to_html_node(node)
         for node in text_nodes
-    ]
+    )
+
+
+def configure_inline_cache(maxsize):
+    global _cached_text_to_children
+    _cached_text_to_children = lru_cache(maxsize=maxsize)(build_text_children)
+    reset_inline_cache_counts()
+
+
+def inline_cache_info():
+    return _cached_text_to_children.cache_info()
+
+
+def clear_inline_cache():
+    _cached_text_to_children.cache_clear()
+    reset_inline_cache_counts()
+
+
+def reset_inline_cache_counts():
+    global _taken_counts, _merged_counts
+    _taken_counts = (0, 0)
+    _merged_counts = (0, 0)
+
+
+def take_inline_cache_counts():
+    # Hits and misses since the last call, which worker processes send
+    # back to the parent like RenderCache.take_updates
+    global _taken_counts
+    info = inline_cache_info()
+    taken_hits, taken_misses = _taken_counts
+    _taken_counts = (info.hits, info.misses)
+    return info.hits - taken_hits, info.misses - taken_misses
+
+
+def merge_inline_cache_counts(counts):
+    global _merged_counts
+    _merged_counts = (
+        _merged_counts[0] + counts[0],
+        _merged_counts[1] + counts[1],
+    )
+
+
+def inline_cache_counts():
+    # Hits and misses in this process plus those merged from workers
+    info = inline_cache_info()
+    return info.hits + _merged_counts[0], info.misses + _merged_counts[1]
+
+
+# Inline fragments repeat across pages (list items, nav paragraphs,
+# disclaimers), so the built leaf nodes are shared between them
+_cached_text_to_children = lru_cache(maxsize=INLINE_CACHE_SIZE)(
+    build_text_children
+)
+_taken_counts = (0, 0)
+_merged_counts = (0, 0)
 
 
 BLOCK_HANDLERS = {
@@ -15,35 +15,125 @@ def markdown_to_blocks(markdown):
     return [block.strip() for block in markdown.split("\n\n") if block]
 
 
+HEADING_REGEX = re.compile(r"#{1,6} ")
+
+
+class MarkdownScanner:
+    def __init__(self):
+        self.title = None
+
+    def scan(self, lines):
+        # Emits the same blocks as markdown_to_blocks. split("\n\n") pairs
+        # newlines left to right, so an empty line only separates blocks
+        # when another line follows it, and the line after a separator
+        # always starts the next block even if it is empty too.
+        piece = None
+        pending_empty = False
+        finish_block = self.finish_block
+
+        for line in lines:
+            if self.title is None:
+                self.check_title(line)
+
+            if piece is None:
+                piece = [line]
+            elif pending_empty:
+                block = finish_block(piece)
+                if block:
+                    yield block
+                piece = [line]
+                pending_empty = False
+            elif not line:
+                pending_empty = True
+            else:
+                piece.append(line)
+
+        if piece is None:
+            return
+        if pending_empty:
+            piece.append("")
+        block = finish_block(piece)
+        if block:
+            yield block
+
+    def check_title(self, line):
+        line = line.strip()
+        if line.startswith("# "):
+            self.title = line[2:].strip()
+
+    @staticmethod
+    def finish_block(lines):
+        if len(lines) == 1 and not lines[0]:
+            return None
+
+        # Equivalent of str.strip() on the joined block
+        first = 0
+        last = len(lines) - 1
+        while first <= last and not lines[first].strip():
+            first += 1
+        while last > first and not lines[last].strip():
+            last -= 1
+        if first > last:
+            # Whitespace-only block, rejected later by block_to_block_type
+            return "", None
+
+        if first > 0 or last < len(lines) - 1:
+            lines = lines[first:last + 1]
+        lines[0] = lines[0].lstrip()
+        lines[-1] = lines[-1].rstrip()
+        return "\n".join(lines), classify_block_lines(lines)
+
+
+def scan_markdown(markdown):
+    scanner = MarkdownScanner()
+    blocks = list(scanner.scan(markdown.split("\n")))
+    return scanner.title, blocks
+
+
 def block_to_block_type(block):
     if not block or not isinstance(block, str):
         raise ValueError("Input must be a non-empty string")
 
+    return classify_block_lines(block.split("\n"))
+
+
+def classify_block_lines(lines):
+    first_line = lines[0]
+
     # Code block: Fenced code syntax using backticks
     # Closing backticks must be on a new line
-    if re.search(r"^```", block) and re.search(r"\n```$", block):
+    if first_line.startswith("```") and (
+            (len(lines) > 1 and lines[-1] == "```")
+            or (len(lines) > 2 and lines[-1] == "" and lines[-2] == "```")):
         return BlockType.CODE
 
     # Heading: Lines starting with # (1-6)
-    if re.match(r"#{1,6} ", block):
+    if HEADING_REGEX.match(first_line):
         return BlockType.HEADING
 
-    lines = block.split("\n")
+    # Quote, list and ordered list blocks are only possible when the first
+    # line already has the right marker, so most paragraphs skip the scans
+    marker = first_line[:1]
 
     # Quote: All lines start with ">"
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
+    if marker == ">":
+        if all(line.startswith(">") for line in lines):
+            return BlockType.QUOTE
 
     # Unordered list: All lines must start with the same consistent marker
     # ("- " or "* ")
-    if all(line.startswith("* ") for line in lines):
-        return BlockType.ULIST
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.ULIST
+    elif marker == "*" or marker == "-":
+        list_marker = marker + " "
+        if all(line.startswith(list_marker) for line in lines):
+            return BlockType.ULIST
 
     # Ordered list: All lines start with "N. " where N is a digit starting at 1
-    if all(line.startswith(f"{i + 1}. ") for i, line in enumerate(lines)):
-        return BlockType.OLIST
+    elif marker == "1":
+        if all(
+                line.startswith(f"{i + 1}. ")
+                for i, line in enumerate(lines)
+        ):
+            return BlockType.OLIST
 
     # Default to paragraph
     return BlockType.PARAGRAPH
@@ -0,0 +1,183 @@
+import gzip
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from file_walker import walk_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_EXTENSIONS = {".html", ".css", ".js", ".svg"}
+# Every suffix a build may have written, including formats whose library
+# is missing now, so their stale sidecars are still found
+SIDECAR_SUFFIXES = (".gz", ".br")
+
+
+def sidecar_decompressors():
+    decompressors = {".gz": gzip.decompress}
+    if brotli is not None:
+        decompressors[".br"] = brotli.decompress
+    return decompressors
+
+
+def sidecar_formats():
+    # (suffix, compress function); servers such as nginx's gzip_static
+    # send name.gz or name.br in place of name
+    formats = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        formats.append((
+            ".br",
+            lambda data: brotli.compress(data, mode=brotli.MODE_TEXT),
+        ))
+    return formats
+
+
+def compress_outputs(build_dir_path, workers=1):
+    # Writes compressed sidecars next to text outputs. A sidecar carries
+    # the mtime of the file it was made from, so outputs the build left
+    # untouched keep theirs and are not compressed again.
+    formats = sidecar_formats()
+    outputs, removed = scan_outputs(build_dir_path)
+    stats = Counter(removed=removed)
+    pending = []
+    for path in outputs:
+        if sidecars_are_current(path, formats):
+            stats["unchanged"] += 1
+        else:
+            pending.append(path)
+
+    if workers > 1 and len(pending) > 1:
+        # zlib and brotli release the GIL while they compress
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            sizes = list(pool.map(
+                lambda path: compress_file(path, formats),
+                pending,
+            ))
+    else:
+        sizes = [compress_file(path, formats) for path in pending]
+
+    for path_sizes in sizes:
+        stats["compressed"] += 1
+        stats.update(path_sizes)
+    return stats
+
+
+def remove_stale_sidecars(build_dir_path, output_paths=None):
+    # Builds without --compress still rewrite outputs, and a server would
+    # keep sending the old page from its sidecar. Given the outputs a
+    # rebuild touched, only their sidecars are checked.
+    if output_paths is None:
+        return scan_outputs(build_dir_path)[1]
+    decompressors = sidecar_decompressors()
+    removed = 0
+    for path in output_paths:
+        for suffix in SIDECAR_SUFFIXES:
+            sidecar_path = path + suffix
+            if (os.path.isfile(sidecar_path)
+                    and not sidecar_is_current(
+                        sidecar_path,
+                        path,
+                        decompressors.get(suffix),
+                    )):
+                os.remove(sidecar_path)
+                removed += 1
+    return removed
+
+
+def scan_outputs(build_dir_path):
+    # Returns the outputs that get sidecars and how many stale sidecars
+    # were deleted: those whose output is gone or has changed since
+    outputs = []
+    removed = 0
+    decompressors = sidecar_decompressors()
+    for path, _ in walk_files(
+            build_dir_path,
+            build_dir_path,
+            skip_special=True):
+        root, extension = os.path.splitext(path)
+        if extension in COMPRESS_EXTENSIONS:
+            outputs.append(path)
+        elif (extension in SIDECAR_SUFFIXES
+                and os.path.splitext(root)[1] in COMPRESS_EXTENSIONS
+                and not sidecar_is_current(
+                    path,
+                    root,
+                    decompressors.get(extension),
+                )):
+            os.remove(path)
+            removed += 1
+    return outputs, removed
+
+
+def sidecar_is_current(sidecar_path, path, decompress=None):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if os.stat(sidecar_path).st_mtime_ns == stat.st_mtime_ns:
+        return True
+    if decompress is None:
+        return False
+
+    # Copies such as merged shards, cp or rsync lose mtimes. A sidecar
+    # that still decompresses to its output is current, and getting the
+    # stamp back means it is not decompressed again next time.
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        with open(sidecar_path, "rb") as f:
+            if decompress(f.read()) != data:
+                return False
+    except Exception:
+        # Corrupt sidecar; zlib and brotli raise their own errors
+        return False
+    os.utime(sidecar_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return True
+
+
+def sidecars_are_current(path, formats):
+    mtime_ns = os.stat(path).st_mtime_ns
+    try:
+        return all(
+            os.stat(path + suffix).st_mtime_ns == mtime_ns
+            for suffix, _ in formats
+        )
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(path, formats):
+    # Returns the input size and the size of each sidecar, keyed by suffix
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = {"input": len(data)}
+    for suffix, compress in formats:
+        output = compress(data)
+        temp_path = f"{path}{suffix}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(output)
+        # Stamped with the mtime seen before reading, so a write racing
+        # this one makes the sidecar stale rather than wrongly current
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, path + suffix)
+        sizes[suffix] = len(output)
+    return sizes
+
+
+def compression_report(stats, seconds):
+    lines = [
+        f"Compressed {stats['compressed']} files in {seconds:.2f}s, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} outdated "
+        "sidecars removed"
+    ]
+    for suffix, _ in sidecar_formats():
+        if stats["input"]:
+            lines.append(
+                f"  {suffix}: {stats['input']} -> {stats[suffix]} bytes "
+                f"({stats[suffix] / stats['input']:.1%})"
+            )
+    return "\n".join(lines)
@@ -1,17 +1,120 @@
 import os
 import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
+from file_walker import walk_files
+from fingerprint import fingerprinted_path
 
-def copy_files_recursive(source, dest):
-    if not os.path.exists(source):
-        raise IOError(f"Source directory '{source}' does not exist")
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-    create_clean_directory(dest)
+COPY_STRATEGIES = ("auto", "copy", "range", "reflink", "hardlink")
+DEFAULT_COPY_WORKERS = 8
+# Below this many files a thread pool costs more than it overlaps
+PARALLEL_COPY_MIN_FILES = 64
 
-    for entry in os.listdir(source):
-        source_path = os.path.join(source, entry)
-        dest_path = os.path.join(dest, entry)
-        copy_item(source_path, dest_path)
+# _IOW(0x94, 9, int) from linux/fs.h: share the source's extents on
+# copy-on-write filesystems such as Btrfs and XFS
+FICLONE = 0x40049409
+
+
+def copy_files_recursive(
+        source,
+        dest,
+        clean=True,
+        manifest=None,
+        strategy="auto",
+        workers=1,
+        assets=None,
+        images=None):
+    # Walk first so a missing source fails before dest is wiped
+    files = list(walk_files(source, dest))
+    if assets:
+        files = [
+            (source_path, fingerprinted_path(dest_path, dest, assets))
+            for source_path, dest_path in files
+        ]
+    if images is not None:
+        # An image may become several outputs: the optimized image and
+        # its resized variants
+        files = [
+            (source_path, output_path)
+            for source_path, dest_path in files
+            for output_path in images.outputs(source_path, dest_path)
+        ]
+
+    def kind(source_path):
+        if images is not None and images.handles(source_path):
+            return images.kind(source_path)
+        return "copy"
+
+    if clean:
+        create_clean_directory(dest)
+    else:
+        os.makedirs(dest, exist_ok=True)
+
+    # With a manifest, an incremental build copies only new or changed
+    # files and deletes only static files that were copied before, leaving
+    # generated pages alone
+    stats = Counter()
+    created_dirs = {dest}
+    pending = []
+    for source_path, dest_path in files:
+        if (not clean and manifest is not None
+                and manifest.static_is_current(
+                    source_path,
+                    dest_path,
+                    kind(source_path),
+                )):
+            stats["unchanged"] += 1
+            continue
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir not in created_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            created_dirs.add(dest_dir)
+        pending.append((source_path, dest_path))
+
+    image_pending = []
+    if images is not None:
+        image_pending = [
+            item for item in pending if images.handles(item[0])
+        ]
+        pending = [item for item in pending if not images.handles(item[0])]
+        images.write(image_pending, strategy)
+
+    if workers > 1 and len(pending) >= PARALLEL_COPY_MIN_FILES:
+        # Copies wait on the disk and release the GIL, so threads overlap
+        # them; output and manifest updates stay on this thread, in order
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            copies = pool.map(
+                lambda item: copy_file(*item, strategy),
+                pending,
+            )
+            for (source_path, dest_path), _ in zip(pending, copies):
+                print(f"  * {source_path} -> {dest_path}")
+    else:
+        for source_path, dest_path in pending:
+            copy_item(source_path, dest_path, strategy)
+
+    for source_path, dest_path in image_pending + pending:
+        if manifest is not None:
+            manifest.record_static(
+                source_path,
+                dest_path,
+                kind(source_path),
+            )
+        stats["copied"] += 1
+
+    if manifest is not None:
+        for removed_path in manifest.remove_stale_static(
+                [dest_path for _, dest_path in files]):
+            print(f"  - {removed_path}")
+            stats["deleted"] += 1
+
+    return stats
 
 
 def create_clean_directory(path):
@@ -20,13 +123,80 @@ def create_clean_directory(path):
     os.mkdir(path)
 
 
-def copy_item(source, dest):
+def copy_item(source, dest, strategy="auto"):
     print(f"  * {source} -> {dest}")
-    if os.path.isfile(source):
+    copy_file(source, dest, strategy)
+
+
+def copy_file(source, dest, strategy="auto"):
+    # Returns the method that did the copy. Unlinking first keeps a write
+    # from going through a hardlink from an earlier build into the source.
+    if os.path.lexists(dest):
+        os.unlink(dest)
+
+    if strategy == "hardlink":
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            # Different filesystem or no link support
+            pass
+    elif strategy == "copy":
         shutil.copy(source, dest)
-    elif os.path.isdir(source):
-        copy_files_recursive(source, dest)
-    else:
-        raise IOError(
-            f"Source item '{source}' is neither a file nor a directory"
-        )
+        return "copy"
+
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        if strategy != "range" and reflink(src, dst):
+            return "reflink"
+        # reflink falls back to a plain copy, skipping the in-kernel ones
+        if strategy != "reflink" and copy_in_kernel(src, dst):
+            return "range"
+        shutil.copyfileobj(src, dst)
+        return "copy"
+
+
+def reflink(src, dst):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def copy_in_kernel(src, dst):
+    # copy_file_range can reflink or copy on the server for network
+    # filesystems; sendfile still avoids copying through user space
+    size = os.fstat(src.fileno()).st_size
+    for copy_chunk in (copy_file_range_chunk, sendfile_chunk):
+        offset = 0
+        try:
+            while offset < size:
+                copied = copy_chunk(
+                    src.fileno(),
+                    dst.fileno(),
+                    offset,
+                    size - offset,
+                )
+                if not copied:
+                    break
+                offset += copied
+        except (OSError, AttributeError):
+            if offset:
+                raise
+            # Unsupported here, or by this platform's os module
+            continue
+        if offset == size:
+            return True
+        if offset:
+            raise IOError(f"'{src.name}' changed while it was being copied")
+    return False
+
+
+def copy_file_range_chunk(src_fd, dst_fd, offset, count):
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+
+def sendfile_chunk(src_fd, dst_fd, offset, count):
+    return os.sendfile(dst_fd, src_fd, offset, count)
@@ -0,0 +1,35 @@
+import os
+
+
+def walk_files(
+        source_dir_path,
+        dest_dir_path,
+        rename=None,
+        skip_special=False):
+    # One scandir per directory: DirEntry caches the file type from the
+    # directory listing, so no entry needs its own exists/isdir/isfile call.
+    # skip_special passes over entries that are neither, such as the
+    # dangling .#name symlinks editors use as lock files.
+    try:
+        with os.scandir(source_dir_path) as scanner:
+            entries = sorted(scanner, key=lambda entry: entry.name)
+    except FileNotFoundError:
+        raise IOError(f"Source directory '{source_dir_path}' does not exist")
+
+    for entry in entries:
+        dest_name = rename(entry.name) if rename else entry.name
+        dest_path = os.path.join(dest_dir_path, dest_name)
+
+        if entry.is_dir():
+            yield from walk_files(
+                entry.path,
+                dest_path,
+                rename,
+                skip_special,
+            )
+        elif entry.is_file():
+            yield entry.path, dest_path
+        elif not skip_special:
+            raise IOError(
+                f"Source item '{entry.path}' is neither a file nor a directory"
+            )
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import re
+
+from file_walker import walk_files
+from manifest import file_digest
+
+# Assets that pages reference and browsers never request by a fixed name;
+# favicon.ico, robots.txt and the like keep their names
+FINGERPRINT_EXTENSIONS = {
+    ".avif",
+    ".css",
+    ".gif",
+    ".jpeg",
+    ".jpg",
+    ".js",
+    ".png",
+    ".svg",
+    ".webp",
+    ".woff",
+    ".woff2",
+}
+FINGERPRINT_LENGTH = 10
+
+ASSET_URL_REGEX = re.compile(r'\b(href|src)="(/[^"]*)"')
+IMG_SRC_REGEX = re.compile(r'<img src="(/[^"]*)"')
+
+
+class AssetMap(dict):
+    # Maps asset URLs such as /index.css to /index.<hash>.css, and image
+    # URLs to the (URL, width) candidates of their srcset. The digest
+    # identifies both in template caches and build settings.
+    def __init__(self, urls=(), srcsets=None):
+        super().__init__(urls)
+        self.srcsets = srcsets or {}
+        data = json.dumps([sorted(self.items()), sorted(self.srcsets.items())])
+        self.digest = hashlib.blake2b(
+            data.encode(),
+            digest_size=16,
+        ).hexdigest()
+
+
+class HashCache:
+    def __init__(self, path=None):
+        self.path = path
+        # source path -> [mtime_ns, size, digest]
+        self.entries = {}
+        self.dirty = False
+        if path:
+            self.load()
+
+    def digest(self, path):
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return entry[2]
+        digest = file_digest(path)
+        self.entries[path] = [stat.st_mtime_ns, stat.st_size, digest]
+        self.dirty = True
+        return digest
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            # A missing or unreadable cache just means rehashing
+            self.entries = {}
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+
+def fingerprint_assets(static_dir_path, hash_cache):
+    assets = {}
+    for source_path, _ in walk_files(static_dir_path, static_dir_path):
+        extension = os.path.splitext(source_path)[1].lower()
+        if extension not in FINGERPRINT_EXTENSIONS:
+            continue
+        url = asset_url(source_path, static_dir_path)
+        assets[url] = fingerprint_name(url, hash_cache.digest(source_path))
+    return AssetMap(assets)
+
+
+def asset_url(path, root):
+    return "/" + os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def fingerprint_name(path, digest):
+    root, extension = os.path.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def fingerprinted_path(dest_path, dest_dir_path, assets):
+    fingerprinted = assets.get(asset_url(dest_path, dest_dir_path))
+    if fingerprinted is None:
+        return dest_path
+    return os.path.join(dest_dir_path, *fingerprinted[1:].split("/"))
+
+
+def rewrite_asset_urls(html, assets, basepath="/"):
+    # Runs before basepath rebasing, while URLs still match the map.
+    # srcset lists several URLs, so they are rebased here instead.
+    srcsets = getattr(assets, "srcsets", None)
+    if srcsets:
+        html = IMG_SRC_REGEX.sub(
+            lambda match: add_srcset(match, srcsets, basepath),
+            html,
+        )
+    if not assets:
+        return html
+    return ASSET_URL_REGEX.sub(
+        lambda match: (
+            f'{match.group(1)}="'
+            f'{assets.get(match.group(2), match.group(2))}"'
+        ),
+        html,
+    )
+
+
+def add_srcset(match, srcsets, basepath):
+    candidates = srcsets.get(match.group(1))
+    if candidates is None:
+        return match.group(0)
+    srcset = ", ".join(
+        f"{basepath}{url[1:]} {width}w" for url, width in candidates
+    )
+    return f'{match.group(0)} srcset="{srcset}"'
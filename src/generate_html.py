@@ -1,63 +1,367 @@
+import filecmp
+import hashlib
 import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
-from markdown import markdown_to_html_node, extract_title
+from block_handlers import (
+    configure_inline_cache,
+    inline_cache_info,
+    merge_inline_cache_counts,
+    take_inline_cache_counts,
+)
+from markdown import (
+    parse_markdown,
+    stream_markdown_to_html,
+    extract_title_from_lines,
+)
+from file_walker import walk_files
+from manifest import build_settings
+from render_cache import RenderCache
+from template import load_template
+
+# Markdown files larger than this are converted block by block straight
+# into the output file instead of being loaded into memory
+STREAM_THRESHOLD_BYTES = 16 * 1024 * 1024
 
 
 def generate_pages_recursive(
         source_dir_path,
         template_path,
         dest_dir_path,
-        basepath):
-    if not os.path.exists(source_dir_path):
-        raise IOError(f"Source directory '{source_dir_path}' does not exist")
-
-    for entry in os.listdir(source_dir_path):
-        source_path = os.path.join(source_dir_path, entry)
-        dest_path = os.path.join(dest_dir_path, os.path.splitext(entry)[0])
-
-        if os.path.isdir(source_path):
-            generate_pages_recursive(
-                source_path,
-                template_path,
-                dest_path,
-                basepath,
+        basepath,
+        render_cache=None,
+        manifest=None,
+        jobs=1,
+        executor="auto",
+        shard=None,
+        assets=None):
+    tasks, stats = plan_pages(
+        source_dir_path,
+        template_path,
+        dest_dir_path,
+        basepath,
+        manifest,
+        shard,
+        assets,
+    )
+
+    if jobs > 1 and len(tasks) > 1:
+        stats.update(
+            generate_pages_parallel(
+                tasks,
+                render_cache,
+                jobs,
+                resolve_executor(executor),
             )
-        elif entry.endswith(".md") and os.path.isfile(source_path):
-            generate_page(
-                source_path,
-                template_path,
-                dest_path + ".html",
-                basepath,
+        )
+    else:
+        for task in tasks:
+            print(f" * {task[0]} -> {task[2]}")
+            stats[generate_page(*task, render_cache)] += 1
+    stats["generated"] += len(tasks)
+
+    return stats
+
+
+def plan_pages(
+        source_dir_path,
+        template_path,
+        dest_dir_path,
+        basepath,
+        manifest=None,
+        shard=None,
+        assets=None):
+    stats = Counter()
+    pages = find_pages(source_dir_path, dest_dir_path)
+    if shard is not None:
+        index, count = shard
+        pages = [
+            (source_path, dest_path)
+            for source_path, dest_path in pages
+            if shard_of(source_path, source_dir_path, count) == index
+        ]
+
+    if manifest is not None:
+        # Stale outputs are found through the old page records, so this
+        # runs before new settings throw those records away
+        for removed_path in manifest.remove_stale_pages(
+                [dest_path for _, dest_path in pages]):
+            print(f" - {removed_path}")
+            stats["removed"] += 1
+        manifest.update_settings(
+            build_settings(template_path, basepath, assets)
+        )
+
+    tasks = []
+    for source_path, dest_path in pages:
+        if manifest is not None:
+            if manifest.page_is_current(source_path, dest_path):
+                stats["unchanged"] += 1
+                continue
+            manifest.record_page(dest_path, manifest.source_entry(source_path))
+        tasks.append(
+            (source_path, template_path, dest_path, basepath, assets)
+        )
+
+    return tasks, stats
+
+
+def generate_pages_parallel(tasks, render_cache, jobs, executor="process"):
+    start = time.perf_counter()
+
+    if executor == "thread":
+        # Workers share the render cache and the inline and template caches
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(
+                partial(generate_page_in_thread, render_cache=render_cache),
+                tasks,
+            )
+            cpu_time, outputs = report_page_results(
+                tasks,
+                results,
+                render_cache,
+            )
+    else:
+        # Many small pages per task keeps pickling and scheduling overhead
+        # low, while a few chunks per worker still balances uneven pages
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=init_page_worker,
+                initargs=(
+                    render_cache is not None,
+                    inline_cache_info().maxsize,
+                )) as pool:
+            results = pool.map(generate_page_task, tasks, chunksize=chunksize)
+            cpu_time, outputs = report_page_results(
+                tasks,
+                results,
+                render_cache,
             )
 
+    elapsed = time.perf_counter() - start
+    gil = "enabled" if gil_enabled() else "disabled"
+    # The share of the workers' wall time spent rendering. This is not a
+    # speedup: benchmarks/bench_jobs.py compares against a serial build.
+    efficiency = cpu_time / (elapsed * jobs)
+    print(f"Rendered {len(tasks)} pages with {jobs} {executor} workers in "
+          f"{elapsed:.2f}s: {efficiency:.0%} parallel efficiency "
+          f"(GIL {gil})")
+    return outputs
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} -> {dest_path}")
 
-    markdown = read_file(from_path)
-    template = read_file(template_path)
+def report_page_results(tasks, results, render_cache):
+    # map returns results in page order, so progress output is
+    # deterministic and the first failing page is the one reported
+    cpu_time = 0
+    outputs = Counter()
+    for task, result in zip(tasks, results):
+        task_cpu_time, cache_updates, inline_counts, output = result
+        print(f" * {task[0]} -> {task[2]}")
+        cpu_time += task_cpu_time
+        outputs[output] += 1
+        if render_cache is not None and cache_updates is not None:
+            render_cache.merge_updates(cache_updates)
+        if inline_counts is not None:
+            merge_inline_cache_counts(inline_counts)
+    return cpu_time, outputs
 
-    title = extract_title(markdown)
-    content = markdown_to_html_node(markdown).to_html()
 
-    html = template.replace("{{ Title }}", title)
-    html = html.replace("{{ Content }}", content)
-    html = html.replace('href="/', f'href="{basepath}')
-    html = html.replace('src="/', f'src="{basepath}')
+def gil_enabled():
+    # sys._is_gil_enabled only exists on 3.13+, where free-threaded builds
+    # can run with the GIL disabled
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled() if is_gil_enabled else True
 
-    write_file(dest_path, html)
 
+def resolve_executor(executor):
+    if executor == "auto":
+        return "process" if gil_enabled() else "thread"
+    return executor
 
-def read_file(path):
-    if not os.path.exists(path):
+
+def generate_page_in_thread(task, render_cache):
+    start = time.thread_time()
+    output = generate_page(*task, render_cache)
+    return time.thread_time() - start, None, None, output
+
+
+worker_render_cache = None
+
+
+def init_page_worker(use_render_cache, inline_cache_size):
+    # Workers start with an empty cache rather than each parsing the saved
+    # one; what they render is sent back and saved by the parent
+    global worker_render_cache
+    if use_render_cache:
+        worker_render_cache = RenderCache(track_updates=True)
+    # Also drops the counts a forked worker inherits from the parent
+    configure_inline_cache(inline_cache_size)
+
+
+def generate_page_task(task):
+    start = time.process_time()
+    output = generate_page(*task, worker_render_cache)
+    cpu_time = time.process_time() - start
+    cache_updates = None
+    if worker_render_cache is not None:
+        cache_updates = worker_render_cache.take_updates()
+    return cpu_time, cache_updates, take_inline_cache_counts(), output
+
+
+def find_pages(source_dir_path, dest_dir_path):
+    return [
+        (source_path, dest_path + ".html")
+        for source_path, dest_path in walk_files(
+            source_dir_path,
+            dest_dir_path,
+            rename=lambda name: os.path.splitext(name)[0],
+            skip_special=True,
+        )
+        if source_path.endswith(".md")
+    ]
+
+
+def page_dest_path(source_path, source_dir_path, dest_dir_path):
+    # The output find_pages gives one page, which drops the extension of
+    # every part of the path
+    parts = os.path.relpath(source_path, source_dir_path).split(os.sep)
+    return os.path.join(
+        dest_dir_path,
+        *(os.path.splitext(part)[0] for part in parts),
+    ) + ".html"
+
+
+def shard_of(source_path, source_dir_path, count):
+    # hash() is salted per process, so every node hashes the path with
+    # blake2b instead to agree on the split
+    key = os.path.relpath(source_path, source_dir_path).replace(os.sep, "/")
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def generate_page(
+        from_path,
+        template_path,
+        dest_path,
+        basepath,
+        assets=None,
+        render_cache=None):
+    template = load_template(template_path, basepath, assets)
+    markdown = read_page_source(from_path)
+
+    if markdown is None:
+        return generate_page_streaming(from_path, template, dest_path)
+
+    return write_file(dest_path, render_page(markdown, template, render_cache))
+
+
+def read_page_source(path):
+    # None means the page is too large to load and has to be streamed
+    with open_file(path) as f:
+        if os.fstat(f.fileno()).st_size > STREAM_THRESHOLD_BYTES:
+            return None
+        return f.read()
+
+
+def render_page(markdown, template, render_cache=None):
+    title, html_node = parse_markdown(markdown, render_cache)
+    return template.render(title, html_node.to_html())
+
+
+def generate_page_streaming(from_path, template, dest_path):
+    # Bypasses the render cache, which would keep every block of the page
+    # in memory and undo the point of streaming it
+    with open_file(from_path) as f:
+        title = extract_title_from_lines(iter_lines(f))
+        f.seek(0)
+        chunks = stream_markdown_to_html(iter_lines(f))
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        temp_path = f"{dest_path}.tmp"
+        try:
+            with open(temp_path, "w") as out:
+                template.stream(out.write, title, chunks)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    return replace_if_changed(temp_path, dest_path)
+
+
+def open_file(path):
+    # Opening directly and translating the errors saves the exists and
+    # isfile calls on every read
+    try:
+        return open(path, "r")
+    except FileNotFoundError:
         raise IOError(f"File '{path}' does not exist")
-    if not os.path.isfile(path):
+    except IsADirectoryError:
         raise IOError(f"'{path}' is not a file")
-    with open(path, "r") as f:
+
+
+def read_file(path):
+    with open_file(path) as f:
         return f.read()
 
 
+def read_lines(path):
+    with open_file(path) as f:
+        yield from iter_lines(f)
+
+
+def iter_lines(f):
+    # Same lines as f.read().split("\n"), read lazily
+    line = ""
+    for line in f:
+        if line.endswith("\n"):
+            yield line[:-1]
+        else:
+            yield line
+    if not line or line.endswith("\n"):
+        yield ""
+
+
 def write_file(path, content):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        f.write(content)
+    # Leaving identical outputs untouched keeps their mtimes, so deploys
+    # only upload what changed; the rename means no reader ever sees a
+    # half-written page
+    try:
+        with open(path, "r") as f:
+            # Text never encodes to fewer bytes than characters, so a
+            # smaller file cannot match
+            if (os.fstat(f.fileno()).st_size >= len(content)
+                    and f.read() == content):
+                return "identical"
+        output = "updated"
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        output = "new"
+    except (OSError, UnicodeDecodeError):
+        output = "updated"
+
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "w") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return output
+
+
+def replace_if_changed(temp_path, path):
+    if not os.path.exists(path):
+        os.replace(temp_path, path)
+        return "new"
+    if filecmp.cmp(temp_path, path, shallow=False):
+        os.remove(temp_path)
+        return "identical"
+    os.replace(temp_path, path)
+    return "updated"
@@ -1,9 +1,37 @@
+import sys
+
+
+class FrozenList(list):
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Shared empty children cannot be modified")
+
+    append = extend = insert = remove = pop = clear = _immutable
+    sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+
+class FrozenDict(dict):
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Shared empty props cannot be modified")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+
+# Shared by every node without children or props instead of allocating a
+# fresh empty list and dict per node
+EMPTY_CHILDREN = FrozenList()
+EMPTY_PROPS = FrozenDict()
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if type(tag) is str else tag
         self.value = value
-        self.children = children or []
-        self.props = props or {}
+        self.children = children or EMPTY_CHILDREN
+        self.props = props or EMPTY_PROPS
 
     def to_html(self):
         raise NotImplementedError()
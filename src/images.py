@@ -0,0 +1,248 @@
+import io
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from copy_static import copy_file
+from file_walker import walk_files
+from fingerprint import asset_url
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Bump to invalidate every cached derivative after changing the pipeline
+IMAGE_PIPELINE_VERSION = "1"
+DEFAULT_IMAGE_WIDTHS = (480, 960, 1440)
+
+# Ancillary chunks that change how the image looks. Everything else that
+# is ancillary (text, EXIF, timestamps, Apple's iDOT) is metadata.
+KEPT_CHUNKS = {b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT"}
+
+
+class ImagePipeline:
+    # Turns each PNG into a recompressed copy plus, when Pillow is
+    # installed, narrower variants for srcset. Derivatives are cached in
+    # cache_dir under the digest of the source bytes, so an image is only
+    # processed again when its content changes.
+    def __init__(
+            self,
+            cache_dir,
+            hash_cache,
+            widths=DEFAULT_IMAGE_WIDTHS,
+            workers=1):
+        self.cache_dir = cache_dir
+        self.hash_cache = hash_cache
+        self.widths = tuple(sorted(widths)) if Image is not None else ()
+        self.workers = workers
+        # Output path -> (source path, width or None for the full size)
+        self.outputs_by_dest = {}
+
+    @staticmethod
+    def handles(path):
+        return path.lower().endswith(".png")
+
+    @staticmethod
+    def kind(path):
+        # Recorded in the build manifest so switching the pipeline on or
+        # upgrading it replaces earlier outputs
+        return f"png-{IMAGE_PIPELINE_VERSION}"
+
+    def variant_widths(self, source_path):
+        if not self.widths:
+            return []
+        try:
+            width, _ = png_dimensions(source_path)
+        except ValueError:
+            return []
+        return [variant for variant in self.widths if variant < width]
+
+    def outputs(self, source_path, dest_path):
+        if not self.handles(source_path):
+            return [dest_path]
+        outputs = [(dest_path, None)] + [
+            (variant_path(dest_path, width), width)
+            for width in self.variant_widths(source_path)
+        ]
+        for output_path, width in outputs:
+            self.outputs_by_dest[output_path] = (source_path, width)
+        return [output_path for output_path, _ in outputs]
+
+    def srcsets(self, static_dir_path, assets=None):
+        # URL of each PNG with variants -> (URL, width) of every size,
+        # using the fingerprinted names when there are any
+        srcsets = {}
+        for source_path, _ in walk_files(static_dir_path, static_dir_path):
+            if not self.handles(source_path):
+                continue
+            widths = self.variant_widths(source_path)
+            if not widths:
+                continue
+            url = asset_url(source_path, static_dir_path)
+            final_url = assets.get(url, url) if assets else url
+            full_width, _ = png_dimensions(source_path)
+            srcsets[url] = [
+                (variant_path(final_url, width), width) for width in widths
+            ] + [(final_url, full_width)]
+        return srcsets
+
+    def derivative_path(self, digest, width):
+        size = f"{width}w" if width else "full"
+        name = f"{digest}-{IMAGE_PIPELINE_VERSION}-{size}.png"
+        return os.path.join(self.cache_dir, name)
+
+    def write(self, pairs, strategy="auto"):
+        # pairs are (source, dest) outputs of this pipeline; the derivatives
+        # missing from the cache are built first, one process per image
+        jobs = {}
+        for source_path, dest_path in pairs:
+            _, width = self.outputs_by_dest[dest_path]
+            digest = self.hash_cache.digest(source_path)
+            if not os.path.exists(self.derivative_path(digest, width)):
+                jobs.setdefault(source_path, set()).add(width)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tasks = [
+            (
+                source_path,
+                [
+                    (width, self.derivative_path(
+                        self.hash_cache.digest(source_path),
+                        width,
+                    ))
+                    for width in sorted(widths, key=lambda w: w or 0)
+                ],
+            )
+            for source_path, widths in jobs.items()
+        ]
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(build_derivatives, tasks))
+        else:
+            for task in tasks:
+                build_derivatives(task)
+
+        for source_path, dest_path in pairs:
+            _, width = self.outputs_by_dest[dest_path]
+            digest = self.hash_cache.digest(source_path)
+            print(f"  * {source_path} -> {dest_path}")
+            copy_file(self.derivative_path(digest, width), dest_path, strategy)
+
+
+def build_derivatives(task):
+    source_path, derivatives = task
+    with open(source_path, "rb") as f:
+        data = f.read()
+    for width, cache_path in derivatives:
+        if width is None:
+            output = recompress_png(data)
+        else:
+            output = resize_png(data, width)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(output)
+        os.replace(temp_path, cache_path)
+
+
+def variant_path(path, width):
+    root, extension = os.path.splitext(path)
+    return f"{root}.{width}w{extension}"
+
+
+def png_dimensions(path):
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise ValueError(f"'{path}' is not a PNG image")
+    return struct.unpack(">II", header[16:24])
+
+
+def read_png_chunks(data):
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("Not a PNG image")
+    chunks = []
+    position = 8
+    while position < len(data):
+        length, chunk_type = struct.unpack(
+            ">I4s",
+            data[position:position + 8],
+        )
+        body = data[position + 8:position + 8 + length]
+        if len(body) != length:
+            raise ValueError("Truncated PNG chunk")
+        chunks.append((chunk_type, body))
+        position += 12 + length
+        if chunk_type == b"IEND":
+            break
+    return chunks
+
+
+def png_chunk(chunk_type, body):
+    crc = zlib.crc32(chunk_type + body)
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(
+        ">I",
+        crc,
+    )
+
+
+def recompress_png(data):
+    # Re-deflates the filtered scanlines at maximum compression and drops
+    # metadata chunks. Pixels are untouched, and the original is kept
+    # whenever the result would not be smaller.
+    try:
+        chunks = read_png_chunks(data)
+    except (ValueError, struct.error):
+        return data
+    if any(chunk_type == b"acTL" for chunk_type, _ in chunks):
+        # Animated PNG frames live in fdAT chunks with their own sequence
+        return data
+
+    try:
+        raw = zlib.decompress(
+            b"".join(body for chunk_type, body in chunks
+                     if chunk_type == b"IDAT")
+        )
+    except zlib.error:
+        return data
+    compressed = min(
+        (
+            deflate(raw, strategy)
+            for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+        ),
+        key=len,
+    )
+
+    parts = [PNG_SIGNATURE]
+    idat_written = False
+    for chunk_type, body in chunks:
+        if chunk_type == b"IDAT":
+            if not idat_written:
+                parts.append(png_chunk(b"IDAT", compressed))
+                idat_written = True
+        # Critical chunks have an uppercase first letter
+        elif chunk_type[:1].isupper() or chunk_type in KEPT_CHUNKS:
+            parts.append(png_chunk(chunk_type, body))
+    output = b"".join(parts)
+    return output if len(output) < len(data) else data
+
+
+def deflate(data, strategy):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(data) + compressor.flush()
+
+
+def resize_png(data, width):
+    with Image.open(io.BytesIO(data)) as image:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        resized.save(
+            output,
+            "PNG",
+            optimize=True,
+            icc_profile=image.info.get("icc_profile"),
+        )
+    return output.getvalue()
@@ -2,7 +2,90 @@ import re
 from textnode import TextNode, TextType
 
 
+# A single alternation recognising every inline token. Delimiters come
+# first so "**" always wins over "*", exactly like the leftmost,
+# non-overlapping matches found by str.split. Image and link parts exclude
+# the delimiter characters because the multi-pass pipeline only ever
+# searches for them in text left over after every delimiter was split out.
+#
+# Every pattern here is linear in the input: there are no nested or
+# adjacent overlapping quantifiers, so a failed match never backtracks
+# into earlier text. Each bracket scan stops at the next bracket and each
+# URL scan at the next parenthesis, so a run of unmatched "[" or "](" is
+# rescanned at most twice.
+INLINE_TOKEN_REGEX = re.compile(
+    r"\*\*|[*_`]"
+    r"|!\[([^\[\]*_`]*)]\(([^()*_`]*)\)"
+    r"|(?<!!)\[([^\[\]*_`]*)]\(([^()*_`]*)\)"
+)
+
+DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "*": TextType.ITALIC,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+# Order in which the multi-pass pipeline splits on each delimiter. Inside
+# an open delimiter, delimiters split earlier end the enclosing text and so
+# leave it unclosed, while delimiters split later are plain text.
+DELIMITER_PRIORITY = {"**": 0, "*": 1, "_": 2, "`": 3}
+
+
 def text_to_textnodes(text):
+    nodes = []
+    start = 0
+    open_delimiter = None
+    open_end = 0
+
+    for match in INLINE_TOKEN_REGEX.finditer(text):
+        token = match.group()
+        match_start = match.start()
+
+        if open_delimiter is not None:
+            if token == open_delimiter:
+                if open_end < match_start:
+                    nodes.append(
+                        TextNode(
+                            text[open_end:match_start],
+                            DELIMITER_TYPES[open_delimiter],
+                        )
+                    )
+                open_delimiter = None
+                start = match.end()
+            elif (token in DELIMITER_PRIORITY
+                  and DELIMITER_PRIORITY[token]
+                  < DELIMITER_PRIORITY[open_delimiter]):
+                # Let the multi-pass pipeline raise its exact error
+                return text_to_textnodes_multipass(text)
+            continue
+
+        if start < match_start:
+            nodes.append(TextNode(text[start:match_start], TextType.TEXT))
+
+        if token in DELIMITER_TYPES:
+            open_delimiter = token
+            open_end = match.end()
+        elif match.group(1) is not None:
+            nodes.append(
+                TextNode(match.group(1), TextType.IMAGE, match.group(2))
+            )
+        else:
+            nodes.append(
+                TextNode(match.group(3), TextType.LINK, match.group(4))
+            )
+        start = match.end()
+
+    if open_delimiter is not None:
+        return text_to_textnodes_multipass(text)
+
+    if start < len(text):
+        nodes.append(TextNode(text[start:], TextType.TEXT))
+
+    return nodes
+
+
+def text_to_textnodes_multipass(text):
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
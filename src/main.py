@@ -1,27 +1,341 @@
-import sys
+import argparse
+import os
+import time
 
-from copy_static import copy_files_recursive
-from generate_html import generate_pages_recursive
+from async_build import generate_pages_async
+from block_handlers import (
+    INLINE_CACHE_SIZE,
+    configure_inline_cache,
+    inline_cache_counts,
+)
+from compress import (
+    compress_outputs,
+    compression_report,
+    remove_stale_sidecars,
+)
+from copy_static import (
+    COPY_STRATEGIES,
+    DEFAULT_COPY_WORKERS,
+    copy_files_recursive,
+    create_clean_directory,
+)
+from fingerprint import AssetMap, HashCache, fingerprint_assets
+from generate_html import generate_pages_recursive, plan_pages
+from images import ImagePipeline
+from manifest import BuildManifest
+from profiler import BuildProfiler, DEFAULT_REPORT_PATH
+from render_cache import RenderCache
+from shards import merge_shards, shard_dir_path
+from watch import watch
 
 static_dir_path = "static"
 content_dir_path = "content"
 build_dir_path = "docs"
 template_path = "template.html"
+render_cache_path = ".cache/render-cache.json"
+asset_hashes_path = ".cache/asset-hashes.json"
+image_cache_path = ".cache/images"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the static site")
+    parser.add_argument(
+        "basepath",
+        nargs="?",
+        default="/",
+        help="URL path the site is served from (default: /)",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete the build directory and regenerate every page",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of workers rendering pages "
+             "(0 uses every CPU, default: 1)",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=("auto", "process", "thread"),
+        default="auto",
+        help="how --jobs workers run; auto uses threads when the GIL is "
+             "disabled and processes otherwise",
+    )
+    parser.add_argument(
+        "--async-io",
+        action="store_true",
+        help="overlap reading, rendering and writing pages with asyncio",
+    )
+    parser.add_argument(
+        "--inline-cache-size",
+        type=int,
+        default=INLINE_CACHE_SIZE,
+        metavar="N",
+        help="number of rendered inline fragments each worker keeps "
+             f"(0 disables the cache, default: {INLINE_CACHE_SIZE})",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and rebuild whatever changes in the static, "
+             "content and template files",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build phase and page, and write a JSON report; "
+             "renders pages serially and without the render cache",
+    )
+    parser.add_argument(
+        "--profile-report",
+        default=DEFAULT_REPORT_PATH,
+        metavar="PATH",
+        help="where --profile writes its report "
+             f"(default: {DEFAULT_REPORT_PATH})",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages to print with --profile (default: 10)",
+    )
+
+    parser.add_argument(
+        "--copy-strategy",
+        choices=COPY_STRATEGIES,
+        default="auto",
+        help="how static files are copied: auto tries a reflink, then an "
+             "in-kernel copy; reflink falls back to a plain copy and range "
+             "never reflinks; hardlink shares the file with static/ and "
+             "copy also copies permission bits (default: auto)",
+    )
+    parser.add_argument(
+        "--copy-workers",
+        type=int,
+        default=DEFAULT_COPY_WORKERS,
+        help="threads copying static files "
+             f"(default: {DEFAULT_COPY_WORKERS})",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy CSS, JavaScript, image and font files as "
+             "name.<hash>.ext and point href and src attributes at them",
+    )
+    parser.add_argument(
+        "--optimize-images",
+        action="store_true",
+        help="recompress PNG images without metadata and, when Pillow is "
+             "installed, add narrower variants to <img> srcset attributes",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz (and .br when brotli is installed) next to each "
+             "changed HTML, CSS, JavaScript and SVG output",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="build only shard I of N (counting from 0) into "
+             f"{build_dir_path}-shard-I-of-N; shard 0 also copies the "
+             "static files",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help=f"combine the output of N shards into {build_dir_path} "
+             "after checking no page is missing or duplicated",
+    )
+
+    args = parser.parse_args()
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint cannot be combined with --watch")
+    if args.optimize_images and args.watch:
+        parser.error("--optimize-images cannot be combined with --watch")
+    if args.compress and args.watch:
+        parser.error("--compress cannot be combined with --watch")
+    if args.shard and (args.watch or args.merge_shards):
+        parser.error("--shard cannot be combined with --watch "
+                     "or --merge-shards")
+    if args.inline_cache_size < 0:
+        parser.error("--inline-cache-size cannot be negative")
+    if args.merge_shards is not None and args.merge_shards < 1:
+        parser.error("--merge-shards needs at least one shard")
+    if args.async_io and args.jobs != 1:
+        parser.error("--async-io renders on one core and cannot use --jobs")
+    if args.profile and (args.async_io or args.watch):
+        parser.error("--profile cannot be combined with --async-io or --watch")
+    return args
+
+
+def parse_shard(text):
+    index, _, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got '{text}'")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(
+            f"shard index must be from 0 to {count - 1}" if count > 0
+            else "shard count must be positive"
+        )
+    return index, count
 
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    args = parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    if args.merge_shards:
+        pages, files = merge_shards(
+            content_dir_path,
+            build_dir_path,
+            args.merge_shards,
+        )
+        print(f"Merged {args.merge_shards} shards into {build_dir_path}: "
+              f"{pages} pages, {files} files")
+        return
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(static_dir_path, build_dir_path)
+    build_dir = build_dir_path
+    if args.shard:
+        build_dir = shard_dir_path(build_dir_path, *args.shard)
+
+    compress_workers = os.cpu_count() or 1
+    profiler = None
+    if args.profile:
+        # Worker processes and threads would bypass the profiling hooks
+        jobs = 1
+        args.copy_workers = 1
+        compress_workers = 1
+        profiler = BuildProfiler()
+        profiler.install()
+
+    assets = None
+    images = None
+    hash_cache = HashCache(asset_hashes_path)
+    if args.optimize_images:
+        images = ImagePipeline(image_cache_path, hash_cache, workers=jobs)
+    if args.fingerprint or images:
+        assets = AssetMap()
+        if args.fingerprint:
+            assets = fingerprint_assets(static_dir_path, hash_cache)
+        if images:
+            assets = AssetMap(
+                assets,
+                images.srcsets(static_dir_path, assets),
+            )
+
+    manifest = BuildManifest(build_dir)
+    clean = args.clean or not manifest.exists
+    if clean:
+        manifest.clear()
+
+    if args.shard is None or args.shard[0] == 0:
+        print("Copying static files to public directory...")
+        static_stats = copy_files_recursive(
+            static_dir_path,
+            build_dir,
+            clean,
+            manifest,
+            args.copy_strategy,
+            args.copy_workers,
+            assets,
+            images,
+        )
+        print(f"Static files: {static_stats['copied']} copied, "
+              f"{static_stats['unchanged']} unchanged, "
+              f"{static_stats['deleted']} deleted")
+    elif clean:
+        create_clean_directory(build_dir)
+    if args.fingerprint or images:
+        hash_cache.save()
 
     print(f"Generating HTML pages...")
-    generate_pages_recursive(
-        content_dir_path,
-        template_path,
-        build_dir_path,
-        basepath,
-    )
+    # Cached blocks would hide the phases a profile is meant to measure
+    render_cache = None
+    if profiler is None:
+        render_cache = RenderCache(render_cache_path)
+    configure_inline_cache(args.inline_cache_size)
+    if args.async_io:
+        tasks, stats = plan_pages(
+            content_dir_path,
+            template_path,
+            build_dir,
+            args.basepath,
+            manifest,
+            args.shard,
+            assets,
+        )
+        pipeline_stats = generate_pages_async(tasks, render_cache)
+        stats["generated"] += len(tasks)
+        stats.update(pipeline_stats.outputs)
+        print(pipeline_stats.report())
+    else:
+        stats = generate_pages_recursive(
+            content_dir_path,
+            template_path,
+            build_dir,
+            args.basepath,
+            render_cache,
+            manifest,
+            jobs,
+            args.executor,
+            args.shard,
+            assets,
+        )
+    manifest.save()
+    if render_cache is not None:
+        render_cache.save()
+    print(f"Pages: {stats['generated']} generated, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+    print(f"Output files: {stats['new']} new, {stats['updated']} updated, "
+          f"{stats['identical']} unchanged")
+    if render_cache is not None:
+        print(f"Render cache: {render_cache.hits} hits, "
+              f"{render_cache.misses} misses")
+    inline_hits, inline_misses = inline_cache_counts()
+    print(f"Inline cache: {inline_hits} hits, {inline_misses} misses")
+
+    if args.compress:
+        start = time.perf_counter()
+        compress_stats = compress_outputs(build_dir, compress_workers)
+        print(compression_report(
+            compress_stats,
+            time.perf_counter() - start,
+        ))
+    else:
+        removed_sidecars = remove_stale_sidecars(build_dir)
+        if removed_sidecars:
+            print(f"Removed {removed_sidecars} outdated compressed files")
+
+    if profiler is not None:
+        profiler.uninstall()
+        profiler.save(args.profile_report)
+        print(profiler.summary(args.profile_top))
+        print(f"Profile written to {args.profile_report}")
+
+    if args.watch:
+        watch(
+            static_dir_path,
+            content_dir_path,
+            template_path,
+            build_dir,
+            args.basepath,
+            manifest,
+            render_cache,
+        )
+        manifest.save()
+        render_cache.save()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+
+from version import GENERATOR_VERSION
+
+# Next to the build directory rather than inside it, which is the
+# published tree: .cache/manifests/<build dir name>.json
+MANIFEST_DIR = os.path.join(".cache", "manifests")
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_settings(template_path, basepath, assets=None):
+    settings = {
+        "generator_version": GENERATOR_VERSION,
+        "basepath": basepath,
+        "template_hash": file_digest(template_path),
+    }
+    if assets is not None:
+        # Pages link to fingerprinted names, so new asset hashes mean
+        # rewriting every page
+        settings["assets_hash"] = assets.digest
+    return settings
+
+
+class BuildManifest:
+    def __init__(self, build_dir_path):
+        self.build_dir_path = build_dir_path
+        self.path = manifest_path(build_dir_path)
+        self.settings = {}
+        self.pages = {}
+        # Static files copied into the build, so syncs only delete those
+        self.static = {}
+        self.exists = False
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # An unreadable manifest just means a full rebuild
+            return
+        self.settings = data.get("settings", {})
+        self.pages = data.get("pages", {})
+        self.static = data.get("static", {})
+        self.exists = True
+
+    def save(self):
+        # A build with no outputs still leaves its (empty) directory
+        os.makedirs(self.build_dir_path, exist_ok=True)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "settings": self.settings,
+                    "pages": self.pages,
+                    "static": self.static,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(temp_path, self.path)
+        self.exists = True
+
+    def clear(self):
+        self.settings = {}
+        self.pages = {}
+        self.static = {}
+
+    def update_settings(self, settings):
+        if settings == self.settings:
+            return False
+        # A new template, basepath or generator invalidates every page
+        self.settings = settings
+        self.pages = {}
+        return True
+
+    def page_key(self, dest_path):
+        return os.path.relpath(dest_path, self.build_dir_path)
+
+    def page_is_current(self, source_path, dest_path):
+        entry = self.pages.get(self.page_key(dest_path))
+        if entry is None or entry["source"] != source_path:
+            return False
+        if not os.path.exists(dest_path):
+            return False
+
+        stat = os.stat(source_path)
+        if (entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size):
+            return True
+        if entry["size"] != stat.st_size:
+            return False
+
+        # Touched but possibly unchanged: fall back to the content hash
+        if file_digest(source_path) != entry["hash"]:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def source_entry(self, source_path):
+        stat = os.stat(source_path)
+        return {
+            "source": source_path,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": file_digest(source_path),
+        }
+
+    def record_page(self, dest_path, entry):
+        self.pages[self.page_key(dest_path)] = entry
+
+    def static_is_current(self, source_path, dest_path, kind="copy"):
+        entry = self.static.get(self.page_key(dest_path))
+        if (entry is None or entry["source"] != source_path
+                or entry.get("kind", "copy") != kind):
+            return False
+        stat = os.stat(source_path)
+        if (entry["mtime_ns"] != stat.st_mtime_ns
+                or entry["size"] != stat.st_size):
+            return False
+        try:
+            output_size = os.stat(dest_path).st_size
+        except FileNotFoundError:
+            return False
+        return output_size == entry.get("output_size", stat.st_size)
+
+    def record_static(self, source_path, dest_path, kind="copy"):
+        # kind says how the output was made from the source, which is not
+        # always a plain copy of the same size
+        stat = os.stat(source_path)
+        self.static[self.page_key(dest_path)] = {
+            "source": source_path,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "kind": kind,
+            "output_size": os.stat(dest_path).st_size,
+        }
+
+    def remove_stale_pages(self, dest_paths):
+        return self.remove_stale(self.pages, dest_paths)
+
+    def remove_stale_static(self, dest_paths):
+        return self.remove_stale(self.static, dest_paths)
+
+    def remove_pages(self, dest_paths):
+        keys = [self.page_key(path) for path in dest_paths]
+        return self.remove_entries(
+            self.pages,
+            [key for key in keys if key in self.pages],
+        )
+
+    def remove_stale(self, entries, dest_paths):
+        current_keys = {self.page_key(path) for path in dest_paths}
+        return self.remove_entries(
+            entries,
+            sorted(set(entries) - current_keys),
+        )
+
+    def remove_entries(self, entries, keys):
+        # Deletes the entries and their outputs
+        removed = []
+        for key in keys:
+            del entries[key]
+            dest_path = os.path.join(self.build_dir_path, key)
+            if os.path.isfile(dest_path):
+                os.remove(dest_path)
+                remove_empty_dirs(
+                    os.path.dirname(dest_path),
+                    self.build_dir_path,
+                )
+                removed.append(dest_path)
+        return removed
+
+
+def manifest_path(build_dir_path):
+    build_dir_path = os.path.abspath(build_dir_path)
+    return os.path.join(
+        os.path.dirname(build_dir_path),
+        MANIFEST_DIR,
+        f"{os.path.basename(build_dir_path)}.json",
+    )
+
+
+def remove_empty_dirs(path, root):
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
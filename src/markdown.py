@@ -1,19 +1,69 @@
 from block_handlers import BLOCK_HANDLERS
-from block_markdown import markdown_to_blocks, block_to_block_type
+from block_markdown import (
+    MarkdownScanner,
+    block_to_block_type,
+    scan_markdown,
+)
+from leafnode import LeafNode
 from parentnode import ParentNode
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, render_cache=None):
+    _, blocks = scan_markdown(markdown)
+    return blocks_to_html_node(blocks, render_cache)
+
+
+def parse_markdown(markdown, render_cache=None):
+    title, blocks = scan_markdown(markdown)
+    if title is None:
+        raise ValueError("No title found for markdown")
+    return title, blocks_to_html_node(blocks, render_cache)
+
+
+def blocks_to_html_node(blocks, render_cache=None):
     children = [
-        block_to_html_node(block)
-        for block in blocks
+        block_to_html_node(block, block_type, render_cache)
+        for block, block_type in blocks
     ]
     return ParentNode("div", children)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def stream_markdown_to_html(lines, render_cache=None):
+    # Yields the same HTML as markdown_to_html_node(...).to_html() one block
+    # at a time, so only the current block is ever held in memory
+    has_blocks = False
+    for block, block_type in MarkdownScanner().scan(lines):
+        if not has_blocks:
+            yield "<div>"
+            has_blocks = True
+        yield block_to_html_node(block, block_type, render_cache).to_html()
+    if not has_blocks:
+        raise ValueError("ParentNode must have at least one child node")
+    yield "</div>"
+
+
+def extract_title_from_lines(lines):
+    scanner = MarkdownScanner()
+    for line in lines:
+        scanner.check_title(line)
+        if scanner.title is not None:
+            return scanner.title
+    raise ValueError("No title found for markdown")
+
+
+def block_to_html_node(block, block_type=None, render_cache=None):
+    if render_cache is not None:
+        html = render_cache.get(block)
+        if html is None:
+            html = render_block(block, block_type).to_html()
+            render_cache.put(block, html)
+        return LeafNode(None, html)
+    return render_block(block, block_type)
+
+
+def render_block(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     handler = BLOCK_HANDLERS.get(block_type)
     if not handler:
         raise ValueError(f"No handler for block type: {block_type}")
@@ -2,21 +2,48 @@ from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("ParentNode must have a tag")
-        if self.children is None or len(self.children) == 0:
-            raise ValueError("ParentNode must have at least one child node")
-        return (
-                f"<{self.tag}{self.props_to_html()}>"
-                + "".join(child.to_html() for child in self.children)
-                + f"</{self.tag}>"
-        )
+        parts = []
+        write_html(self, parts.append)
+        return "".join(parts)
 
     def __repr__(self):
         children_repr = [child.tag for child in self.children]
         return (f"ParentNode(tag={repr(self.tag)}, "
                 f"props={repr(self.props)}, children={children_repr})")
+
+
+def write_html(node, write):
+    # Walks the tree with an explicit stack of child iterators and passes
+    # each piece to write (list.append, StringIO.write or a file's write)
+    # exactly once, so deep trees neither recurse nor copy their subtrees
+    # at every level
+    if not isinstance(node, ParentNode):
+        write(node.to_html())
+        return
+
+    stack = [open_parent(node, write)]
+    while stack:
+        children, closing_tag = stack[-1]
+        for child in children:
+            if isinstance(child, ParentNode):
+                stack.append(open_parent(child, write))
+                break
+            write(child.to_html())
+        else:
+            write(closing_tag)
+            stack.pop()
+
+
+def open_parent(node, write):
+    if node.tag is None:
+        raise ValueError("ParentNode must have a tag")
+    if not node.children:
+        raise ValueError("ParentNode must have at least one child node")
+    write(f"<{node.tag}{node.props_to_html()}>")
+    return iter(node.children), f"</{node.tag}>"
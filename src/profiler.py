@@ -0,0 +1,189 @@
+import json
+import os
+import time
+import tracemalloc
+from functools import wraps
+
+import block_handlers
+import block_markdown
+import compress
+import copy_static
+import generate_html
+import markdown
+import parentnode
+import template
+
+DEFAULT_REPORT_PATH = ".cache/build-profile.json"
+
+# (owner, attribute, phase); callers look these names up at call time, so
+# replacing them routes every call through the profiler
+HOOKS = (
+    (generate_html, "walk_files", "walk"),
+    (copy_static, "walk_files", "walk"),
+    (generate_html, "read_page_source", "read_file"),
+    (markdown, "scan_markdown", "markdown_to_blocks"),
+    (block_markdown, "classify_block_lines", "classify"),
+    (block_handlers, "text_to_children", "inline"),
+    (parentnode, "write_html", "to_html"),
+    (template.Template, "render", "template"),
+    (template.Template, "stream", "template"),
+    (generate_html, "write_file", "write_file"),
+    (generate_html, "replace_if_changed", "write_file"),
+    (copy_static, "copy_item", "static_copy"),
+    (compress, "compress_file", "compress"),
+)
+
+# Walks are generators, so they are timed by consuming them
+MATERIALIZED = {"walk"}
+
+
+# Nothing is wrapped or traced until install is called, so a build
+# without --profile runs the plain functions. Each phase is charged its own
+# time and the bytes it allocated and had not freed when it returned, as
+# traced by tracemalloc, excluding the phases nested inside it.
+class BuildProfiler:
+    def __init__(self):
+        self.phases = {}
+        self.pages = []
+        self.page = None
+        self.stack = []
+        self.originals = []
+        self.started_tracing = False
+        self.start = None
+        self.elapsed = 0.0
+
+    def install(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        for owner, name, phase in HOOKS:
+            original = getattr(owner, name)
+            self.originals.append((owner, name, original))
+            setattr(owner, name, self.wrap(phase, original))
+        self.originals.append(
+            (generate_html, "generate_page", generate_html.generate_page)
+        )
+        generate_html.generate_page = self.wrap_page(
+            generate_html.generate_page
+        )
+        self.start = time.perf_counter()
+
+    def uninstall(self):
+        self.elapsed = time.perf_counter() - self.start
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals = []
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def wrap(self, phase, function):
+        materialize = phase in MATERIALIZED
+
+        @wraps(function)
+        def profiled(*args, **kwargs):
+            # [child seconds, child bytes] of phases nested in this one
+            frame = [0.0, 0]
+            self.stack.append(frame)
+            allocated = traced_bytes()
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+                if materialize:
+                    result = list(result)
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                allocated = traced_bytes() - allocated
+                self.stack.pop()
+                if self.stack:
+                    self.stack[-1][0] += seconds
+                    self.stack[-1][1] += allocated
+                self.record(phase, seconds - frame[0], allocated - frame[1])
+
+        return profiled
+
+    def wrap_page(self, function):
+        @wraps(function)
+        def profiled(from_path, template_path, dest_path, *args, **kwargs):
+            self.page = {
+                "source": from_path,
+                "dest": dest_path,
+                "seconds": 0.0,
+                "bytes": 0,
+                "phases": {},
+            }
+            allocated = traced_bytes()
+            start = time.perf_counter()
+            try:
+                return function(
+                    from_path,
+                    template_path,
+                    dest_path,
+                    *args,
+                    **kwargs,
+                )
+            finally:
+                self.page["seconds"] = time.perf_counter() - start
+                self.page["bytes"] = traced_bytes() - allocated
+                self.pages.append(self.page)
+                self.page = None
+
+        return profiled
+
+    def record(self, phase, seconds, allocated):
+        totals = [self.phases]
+        if self.page is not None:
+            totals.append(self.page["phases"])
+        for phases in totals:
+            entry = phases.setdefault(
+                phase,
+                {"calls": 0, "seconds": 0.0, "bytes": 0},
+            )
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += allocated
+
+    def slowest_pages(self, count):
+        return sorted(
+            self.pages,
+            key=lambda page: page["seconds"],
+            reverse=True,
+        )[:count]
+
+    def report(self):
+        return {
+            "seconds": self.elapsed,
+            "phases": self.phases,
+            "pages": self.slowest_pages(len(self.pages)),
+        }
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def summary(self, top=10):
+        lines = [
+            f"Profile: {self.elapsed:.3f}s total",
+            f"  {'phase':<20}{'calls':>8}{'seconds':>10}{'net bytes':>12}",
+        ]
+        for phase, entry in sorted(
+                self.phases.items(),
+                key=lambda item: item[1]["seconds"],
+                reverse=True):
+            lines.append(
+                f"  {phase:<20}{entry['calls']:>8}"
+                f"{entry['seconds']:>10.4f}{entry['bytes']:>12}"
+            )
+        if self.pages:
+            lines.append(f"Slowest {min(top, len(self.pages))} pages:")
+            for page in self.slowest_pages(top):
+                lines.append(f"  {page['seconds']:.4f}s {page['source']}")
+        return "\n".join(lines)
+
+
+def traced_bytes():
+    return tracemalloc.get_traced_memory()[0]
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+
+from version import GENERATOR_VERSION
+
+DEFAULT_MAX_ENTRIES = 100_000
+# Counted in characters of HTML, which are bytes for ASCII
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# A block larger than this share of the cache would push out most others
+MAX_ENTRY_SHARE = 16
+
+
+class RenderCache:
+    def __init__(
+            self,
+            path=None,
+            max_entries=DEFAULT_MAX_ENTRIES,
+            max_bytes=DEFAULT_MAX_BYTES,
+            track_updates=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        # Worker processes send their new entries back to the parent
+        self.updates = {} if track_updates else None
+        # Shared by every page when rendering with threads
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    @staticmethod
+    def key(block):
+        data = f"{GENERATOR_VERSION}\0{block}".encode()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get(self, block):
+        key = self.key(block)
+        with self.lock:
+            html = self.entries.pop(key, None)
+            if html is None:
+                self.misses += 1
+                return None
+            # Re-insert so the dict stays ordered from least to most recent
+            self.entries[key] = html
+            self.hits += 1
+            return html
+
+    def put(self, block, html):
+        if len(html) > self.max_bytes // MAX_ENTRY_SHARE:
+            return
+        key = self.key(block)
+        with self.lock:
+            self.insert(key, html)
+            if self.updates is not None:
+                self.updates[key] = html
+            self.dirty = True
+            self.evict()
+
+    def insert(self, key, html):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = html
+        self.size += len(html)
+
+    def evict(self):
+        while (len(self.entries) > self.max_entries
+               or self.size > self.max_bytes):
+            self.size -= len(self.entries.pop(next(iter(self.entries))))
+
+    def take_updates(self):
+        with self.lock:
+            updates = (self.updates, self.hits, self.misses)
+            self.updates = {}
+            self.hits = 0
+            self.misses = 0
+            return updates
+
+    def merge_updates(self, updates):
+        entries, hits, misses = updates
+        with self.lock:
+            for key, html in entries.items():
+                self.insert(key, html)
+            if entries:
+                self.dirty = True
+                self.evict()
+            self.hits += hits
+            self.misses += misses
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt cache only costs a full render
+            return
+        if data.get("version") == GENERATOR_VERSION:
+            self.entries = data.get("entries", {})
+            self.size = sum(map(len, self.entries.values()))
+            self.evict()
+
+    def save(self):
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(
+                    {"version": GENERATOR_VERSION, "entries": self.entries},
+                    f,
+                )
+            os.replace(temp_path, self.path)
+            self.dirty = False
+
+    def __repr__(self):
+        return (f"RenderCache(path={repr(self.path)}, "
+                f"entries={len(self.entries)}, hits={self.hits}, "
+                f"misses={self.misses})")
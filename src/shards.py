@@ -0,0 +1,78 @@
+import os
+
+from copy_static import copy_item, create_clean_directory
+from file_walker import walk_files
+from generate_html import find_pages, shard_of
+from manifest import BuildManifest
+
+
+def shard_dir_path(build_dir_path, index, count):
+    return f"{build_dir_path}-shard-{index}-of-{count}"
+
+
+def merge_shards(source_dir_path, build_dir_path, count):
+    shard_dirs = [
+        shard_dir_path(build_dir_path, index, count) for index in range(count)
+    ]
+    missing_dirs = [path for path in shard_dirs if not os.path.isdir(path)]
+    if missing_dirs:
+        raise IOError(f"Missing shard output: {', '.join(missing_dirs)}")
+
+    # Check everything before the build directory is replaced
+    problems = []
+    settings = None
+    pages = {}
+    static = {}
+    files = {}
+    for index, shard_dir in enumerate(shard_dirs):
+        manifest = BuildManifest(shard_dir)
+        if not manifest.exists:
+            problems.append(f"'{shard_dir}' has no build manifest")
+        elif settings is None:
+            settings = manifest.settings
+        elif manifest.settings != settings:
+            problems.append(f"'{shard_dir}' was built with other settings")
+
+        for key, entry in manifest.pages.items():
+            if key in pages:
+                problems.append(f"Page '{key}' was built by several shards")
+            elif shard_of(entry["source"], source_dir_path, count) != index:
+                problems.append(f"Page '{key}' belongs to another shard")
+            pages[key] = entry
+        static.update(manifest.static)
+
+        for source_path, dest_path in walk_files(shard_dir, build_dir_path):
+            if dest_path in files:
+                key = os.path.relpath(dest_path, build_dir_path)
+                problems.append(f"File '{key}' is in several shards")
+            files[dest_path] = source_path
+
+    expected = {
+        os.path.relpath(dest_path, build_dir_path)
+        for _, dest_path in find_pages(source_dir_path, build_dir_path)
+    }
+    for key in sorted(expected - set(pages)):
+        problems.append(f"Page '{key}' is missing from every shard")
+    for key in sorted(set(pages) - expected):
+        problems.append(f"Page '{key}' has no source in '{source_dir_path}'")
+    for key in sorted(pages):
+        if os.path.join(build_dir_path, key) not in files:
+            problems.append(f"Page '{key}' is in a manifest but not its shard")
+    if problems:
+        raise ValueError("Cannot merge shards:\n  " + "\n  ".join(problems))
+
+    create_clean_directory(build_dir_path)
+    created_dirs = {build_dir_path}
+    for dest_path, source_path in sorted(files.items()):
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir not in created_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            created_dirs.add(dest_dir)
+        copy_item(source_path, dest_path)
+
+    manifest = BuildManifest(build_dir_path)
+    manifest.settings = settings
+    manifest.pages = pages
+    manifest.static = static
+    manifest.save()
+    return len(pages), len(files)
@@ -0,0 +1,97 @@
+import os
+import re
+import threading
+
+from fingerprint import rewrite_asset_urls
+
+PLACEHOLDER_REGEX = re.compile(r"\{\{ (Title|Content) }}")
+
+# Compiled templates by (path, basepath, asset map digest), with the mtime
+# and size they were compiled from so edits are picked up by long-running
+# builds
+compiled_templates = {}
+compiled_templates_lock = threading.Lock()
+
+
+class Template:
+    def __init__(self, text, basepath="/", assets=None):
+        self.basepath = basepath
+        self.assets = assets
+        # segments[i] is the static HTML before slots[i]; the final segment
+        # follows the last slot. Static HTML is rebased once, here.
+        self.segments = []
+        self.slots = []
+
+        start = 0
+        for match in PLACEHOLDER_REGEX.finditer(text):
+            self.segments.append(self.rebase(text[start:match.start()]))
+            self.slots.append(match.group(1))
+            start = match.end()
+        self.segments.append(self.rebase(text[start:]))
+
+    def rebase(self, html):
+        if self.assets is not None:
+            html = rewrite_asset_urls(html, self.assets, self.basepath)
+        if self.basepath == "/":
+            return html
+        return rebase_urls(html, self.basepath)
+
+    def render(self, title, content):
+        values = {
+            "Title": self.rebase(title),
+            "Content": self.rebase(content),
+        }
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def stream(self, write, title, content_chunks):
+        if self.slots.count("Content") != 1:
+            raise ValueError(
+                "Template must contain exactly one {{ Content }} "
+                "placeholder to stream pages"
+            )
+
+        title = self.rebase(title)
+        write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot == "Title":
+                write(title)
+            else:
+                # Rebased URLs never span block boundaries, so rebasing
+                # each chunk gives the same result as rebasing the page
+                for chunk in content_chunks:
+                    write(self.rebase(chunk))
+            write(segment)
+
+    def __repr__(self):
+        return (f"Template(basepath={repr(self.basepath)}, "
+                f"slots={self.slots})")
+
+
+def load_template(path, basepath="/", assets=None):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise IOError(f"File '{path}' does not exist")
+
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (path, basepath, assets.digest if assets is not None else None)
+    with compiled_templates_lock:
+        cached = compiled_templates.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        if not os.path.isfile(path):
+            raise IOError(f"'{path}' is not a file")
+        with open(path, "r") as f:
+            template = Template(f.read(), basepath, assets)
+        compiled_templates[key] = (version, template)
+        return template
+
+
+def rebase_urls(html, basepath):
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
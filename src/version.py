@@ -0,0 +1,3 @@
+# Bump whenever the generated HTML can change for the same input, so
+# cached renders and build manifests from older versions are discarded
+GENERATOR_VERSION = "1"
@@ -0,0 +1,394 @@
+import ctypes
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from collections import Counter
+
+from compress import remove_stale_sidecars
+from copy_static import copy_files_recursive
+from file_walker import walk_files
+from generate_html import (
+    generate_page,
+    generate_pages_recursive,
+    page_dest_path,
+)
+
+POLL_INTERVAL = 0.5
+# Editors save in several steps (temporary file, rename, chmod); events
+# that arrive this close together are handled as one change
+SETTLE_DELAY = 0.05
+
+# Event bits from linux/inotify.h
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_EVENTS = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def watch(
+        static_dir_path,
+        content_dir_path,
+        template_path,
+        build_dir_path,
+        basepath,
+        manifest,
+        render_cache,
+        interval=POLL_INTERVAL):
+    # The template and caches stay warm between rebuilds, and each change
+    # only touches the files it names
+    watched = (static_dir_path, content_dir_path, template_path)
+    print(f"Watching {', '.join(watched)} for changes (Ctrl+C to stop)...")
+    watcher = create_watcher(watched)
+    # main.sh stops the watcher with SIGTERM; treating it like Ctrl+C lets
+    # the caller save the warm render cache
+    previous_handler = signal.signal(signal.SIGTERM, stop_watching)
+    try:
+        while True:
+            changed, removed = watcher.poll(interval)
+            if changed is not None and not changed and not removed:
+                continue
+            try:
+                rebuild_changes(
+                    changed,
+                    removed,
+                    static_dir_path,
+                    content_dir_path,
+                    template_path,
+                    build_dir_path,
+                    basepath,
+                    manifest,
+                    render_cache,
+                )
+            except Exception as error:
+                # Forget pages recorded by the failed rebuild so they are
+                # rendered again once the error is fixed
+                manifest.load()
+                print(f"Rebuild failed: {error}")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        watcher.close()
+
+
+def stop_watching(signum, frame):
+    raise KeyboardInterrupt
+
+
+def create_watcher(paths):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except OSError as error:
+            # Usually the per-user limit on inotify watches
+            print(f"Falling back to polling: {error}")
+    return PollingWatcher(paths)
+
+
+class InotifyWatcher:
+    # The kernel reports changes, so an idle watch costs nothing however
+    # many files the site has. poll returns the changed and removed paths,
+    # or None for both when the events no longer add up and everything has
+    # to be checked.
+    def __init__(self, paths):
+        self.paths = paths
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = -1
+        self.open()
+
+    def open(self):
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch descriptor -> directory it reports on, and for directories
+        # watched for a single file, that file's name
+        self.dirs = {}
+        self.only = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                self.add_tree(path)
+            else:
+                self.add_file(path)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(
+            self.fd,
+            os.fsencode(path or "."),
+            WATCH_EVENTS,
+        )
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"Cannot watch '{path}': "
+                                 f"{os.strerror(error)}")
+        return wd
+
+    def add_tree(self, path):
+        # Returns the files already there: a new directory can gain files
+        # before its watch exists
+        files = []
+        for directory, _, names in os.walk(path):
+            wd = self.add_watch(directory)
+            self.dirs[wd] = directory
+            self.only.pop(wd, None)
+            files.extend(os.path.join(directory, name) for name in names)
+        return files
+
+    def add_file(self, path):
+        directory, name = os.path.split(path)
+        wd = self.add_watch(directory)
+        if wd not in self.dirs:
+            self.dirs[wd] = directory
+            self.only[wd] = name
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], []
+        time.sleep(SETTLE_DELAY)
+
+        changed = set()
+        removed = set()
+        lost_track = False
+        for wd, mask, name in self.read_events():
+            directory = self.dirs.get(wd)
+            if mask & IN_Q_OVERFLOW:
+                lost_track = True
+            elif directory is None:
+                continue
+            elif mask & IN_IGNORED:
+                # The directory is gone; its files were reported first
+                del self.dirs[wd]
+                self.only.pop(wd, None)
+            elif wd in self.only and name != self.only[wd]:
+                continue
+            elif mask & IN_ISDIR:
+                path = os.path.join(directory, name)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self.add_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    # Its watches now report under a path that is gone
+                    lost_track = True
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                path = os.path.join(directory, name)
+                changed.discard(path)
+                removed.add(path)
+            else:
+                path = os.path.join(directory, name)
+                removed.discard(path)
+                changed.add(path)
+
+        if lost_track:
+            self.close()
+            self.open()
+            return None, None
+        return sorted(changed), sorted(removed)
+
+    def read_events(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                yield wd, mask, os.fsdecode(name)
+
+
+class PollingWatcher:
+    # Everywhere else: stats every watched file on each poll
+    def __init__(self, paths):
+        self.paths = paths
+        self.snapshot = snapshot_files(paths)
+
+    def close(self):
+        pass
+
+    def poll(self, timeout):
+        time.sleep(timeout)
+        try:
+            current = snapshot_files(self.paths)
+        except IOError:
+            # A directory vanished mid-walk; look again next poll
+            return [], []
+        changed, removed = changed_files(self.snapshot, current)
+        self.snapshot = current
+        return changed, removed
+
+
+def snapshot_files(paths):
+    snapshot = {}
+    for path in paths:
+        if os.path.isdir(path):
+            file_paths = [
+                source
+                for source, _ in walk_files(path, path, skip_special=True)
+            ]
+        elif os.path.isfile(path):
+            file_paths = [path]
+        else:
+            continue
+        for file_path in file_paths:
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def changed_files(old_snapshot, new_snapshot):
+    changed = sorted(
+        path
+        for path, stat in new_snapshot.items()
+        if old_snapshot.get(path) != stat
+    )
+    removed = sorted(set(old_snapshot) - set(new_snapshot))
+    return changed, removed
+
+
+def rebuild_changes(
+        changed,
+        removed,
+        static_dir_path,
+        content_dir_path,
+        template_path,
+        build_dir_path,
+        basepath,
+        manifest,
+        render_cache=None):
+    # changed and removed are None when the watcher lost track, which
+    # checks everything. The manifest is saved after full rebuilds only;
+    # one saved earlier just means a few more pages are rendered again.
+    start = time.perf_counter()
+    stats = Counter()
+    rebuild_all = changed is None
+    paths = [] if rebuild_all else changed + removed
+    static_prefix = os.path.join(static_dir_path, "")
+    static_paths = [path for path in paths if path.startswith(static_prefix)]
+    outputs = [
+        os.path.join(build_dir_path, os.path.relpath(path, static_dir_path))
+        for path in static_paths
+    ]
+
+    if rebuild_all or static_paths:
+        # The manifest knows what was copied, so only changed files are
+        # copied again and only deleted ones are removed
+        static_stats = copy_files_recursive(
+            static_dir_path,
+            build_dir_path,
+            clean=False,
+            manifest=manifest,
+        )
+        stats["copied"] += static_stats["copied"]
+        stats["deleted"] += static_stats["deleted"]
+
+    if rebuild_all or template_path in paths:
+        # New settings re-render every page
+        rebuild_all = True
+        stats.update(
+            generate_pages_recursive(
+                content_dir_path,
+                template_path,
+                build_dir_path,
+                basepath,
+                render_cache,
+                manifest,
+            )
+        )
+    else:
+        content_prefix = os.path.join(content_dir_path, "")
+
+        def pages(paths):
+            return [
+                path for path in paths
+                if path.startswith(content_prefix) and path.endswith(".md")
+            ]
+
+        page_stats, page_outputs = rebuild_pages(
+            pages(changed),
+            pages(removed),
+            content_dir_path,
+            template_path,
+            build_dir_path,
+            basepath,
+            manifest,
+            render_cache,
+        )
+        stats.update(page_stats)
+        outputs.extend(page_outputs)
+
+    if rebuild_all:
+        manifest.save()
+        remove_stale_sidecars(build_dir_path)
+    else:
+        remove_stale_sidecars(build_dir_path, outputs)
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Rebuilt {stats['generated']} pages and copied "
+          f"{stats['copied']} files in {elapsed:.1f} ms")
+    return stats
+
+
+def rebuild_pages(
+        changed,
+        removed,
+        content_dir_path,
+        template_path,
+        build_dir_path,
+        basepath,
+        manifest,
+        render_cache=None):
+    # Renders and records just these pages; the rest of the site is not
+    # walked. Returns the stats and the output paths touched.
+    stats = Counter()
+    outputs = []
+    for source_path in removed:
+        dest_path = page_dest_path(source_path, content_dir_path,
+                                   build_dir_path)
+        outputs.append(dest_path)
+        for removed_path in manifest.remove_pages([dest_path]):
+            print(f" - {removed_path}")
+            stats["removed"] += 1
+
+    for source_path in changed:
+        if not os.path.isfile(source_path):
+            # Editor lock files are dangling symlinks
+            continue
+        dest_path = page_dest_path(source_path, content_dir_path,
+                                   build_dir_path)
+        outputs.append(dest_path)
+        if manifest.page_is_current(source_path, dest_path):
+            stats["unchanged"] += 1
+            continue
+        entry = manifest.source_entry(source_path)
+        print(f" * {source_path} -> {dest_path}")
+        stats[generate_page(
+            source_path,
+            template_path,
+            dest_path,
+            basepath,
+            render_cache=render_cache,
+        )] += 1
+        manifest.record_page(dest_path, entry)
+        stats["generated"] += 1
+    return stats, outputs
@@ -0,0 +1,27 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+PAGE_TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TempTreeTestCase(unittest.TestCase):
+    # Gives each test its own directory tree, removed when the test ends.
+    # Build progress lines go to self.stdout instead of the test output.
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.stdout = io.StringIO()
+        self.enterContext(contextlib.redirect_stdout(self.stdout))
+
+    def path(self, *names):
+        return os.path.join(self.temp_dir.name, *names)
+
+    def write(self, name, content):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
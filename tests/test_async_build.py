@@ -0,0 +1,72 @@
+import unittest
+
+from async_build import generate_pages_async
+from generate_html import generate_pages_recursive, plan_pages, read_file
+from render_cache import RenderCache
+from temp_tree import TempTreeTestCase
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestAsyncBuild(TempTreeTestCase):
+    def test_generate_pages_async_matches_serial(self):
+        # Arrange
+        template = self.write("template.html", TEMPLATE)
+        names = [f"page{i}" for i in range(10)]
+        for name in names:
+            self.write(
+                f"content/{name}.md",
+                f"# {name}\n\nSome **text** on {name}",
+            )
+        generate_pages_recursive(
+            self.path("content"),
+            template,
+            self.path("serial"),
+            "/",
+        )
+        tasks, _ = plan_pages(
+            self.path("content"),
+            template,
+            self.path("async"),
+            "/",
+        )
+
+        # Act
+        stats = generate_pages_async(
+            tasks,
+            RenderCache(),
+            read_ahead=2,
+            write_behind=2,
+            io_workers=2,
+        )
+
+        # Assert
+        self.assertEqual(len(names), stats.pages)
+        self.assertLessEqual(max(stats.read_depths), 2)
+        for name in names:
+            self.assertEqual(
+                read_file(self.path("serial", f"{name}.html")),
+                read_file(self.path("async", f"{name}.html")),
+            )
+
+    def test_generate_pages_async_raises_render_errors(self):
+        # Arrange
+        self.write("content/page.md", "## No title")
+        template = self.write("template.html", TEMPLATE)
+        tasks, _ = plan_pages(
+            self.path("content"),
+            template,
+            self.path("out"),
+            "/",
+        )
+
+        # Act
+        with self.assertRaises(ValueError) as error:
+            generate_pages_async(tasks)
+
+        # Assert
+        self.assertEqual("No title found for markdown", str(error.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
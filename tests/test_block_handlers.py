@@ -0,0 +1,92 @@
+import unittest
+
+from block_handlers import (
+    text_to_children,
+    configure_inline_cache,
+    inline_cache_counts,
+    inline_cache_info,
+    clear_inline_cache,
+    merge_inline_cache_counts,
+    take_inline_cache_counts,
+    INLINE_CACHE_SIZE,
+)
+from leafnode import LeafNode
+
+
+class TestBlockHandlers(unittest.TestCase):
+    def setUp(self):
+        clear_inline_cache()
+
+    def tearDown(self):
+        configure_inline_cache(INLINE_CACHE_SIZE)
+
+    def test_text_to_children(self):
+        # Act
+        result = text_to_children("Text with **bold**")
+
+        # Assert
+        self.assertEqual(
+            [
+                repr(LeafNode(None, "Text with ")),
+                repr(LeafNode("b", "bold")),
+            ],
+            [repr(node) for node in result],
+        )
+
+    def test_text_to_children_counts_cache_hits(self):
+        # Arrange
+        text = "Repeated *disclaimer* text"
+
+        # Act
+        first = text_to_children(text)
+        second = text_to_children(text)
+        info = inline_cache_info()
+
+        # Assert
+        self.assertEqual(1, info.misses)
+        self.assertEqual(1, info.hits)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_configure_inline_cache_size(self):
+        # Arrange
+        configure_inline_cache(1)
+
+        # Act
+        text_to_children("first")
+        text_to_children("second")
+        text_to_children("first")
+        info = inline_cache_info()
+
+        # Assert
+        self.assertEqual(1, info.maxsize)
+        self.assertEqual(3, info.misses)
+        self.assertEqual(0, info.hits)
+
+    def test_take_inline_cache_counts_returns_counts_since_last_take(self):
+        # Arrange
+        text_to_children("first")
+        text_to_children("first")
+        take_inline_cache_counts()
+        text_to_children("first")
+
+        # Act
+        counts = take_inline_cache_counts()
+
+        # Assert
+        self.assertEqual((1, 0), counts)
+
+    def test_inline_cache_counts_include_merged_worker_counts(self):
+        # Arrange
+        text_to_children("first")
+
+        # Act
+        merge_inline_cache_counts((5, 2))
+        merge_inline_cache_counts((1, 1))
+
+        # Assert
+        self.assertEqual((6, 4), inline_cache_counts())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
 import unittest
-from block_markdown import BlockType, markdown_to_blocks, block_to_block_type
+from block_markdown import (
+    BlockType,
+    markdown_to_blocks,
+    block_to_block_type,
+    scan_markdown,
+)
 
 
 class TestBlockMarkdown(unittest.TestCase):
@@ -275,5 +280,68 @@ class TestBlockMarkdown(unittest.TestCase):
         self.assertEqual(BlockType.PARAGRAPH, result)
 
 
+    def test_scan_markdown(self):
+        # Arrange
+        markdown = (
+            "  # Title  \n"
+            "\n"
+            "Paragraph of text.\n"
+            "\n"
+            "* List 1\n"
+            "* List 2\n"
+            "\n"
+            "```\n"
+            "code\n"
+            "```")
+
+        # Act
+        title, blocks = scan_markdown(markdown)
+
+        # Assert
+        self.assertEqual("Title", title)
+        self.assertListEqual(
+            [
+                ("# Title", BlockType.HEADING),
+                ("Paragraph of text.", BlockType.PARAGRAPH),
+                ("* List 1\n* List 2", BlockType.ULIST),
+                ("```\ncode\n```", BlockType.CODE),
+            ],
+            blocks,
+        )
+
+    def test_scan_markdown_matches_markdown_to_blocks(self):
+        # Arrange
+        markdowns = [
+            "",
+            "\n\nLeading newlines",
+            "Odd\n\n\nnewline runs\n\n\n\n\nbetween blocks",
+            "Whitespace lines\n  \n\t\nstay inside a block",
+            "\n  \n  Stripped block  \n   ",
+            "> Quote\n> lines\n\n1. One\n2. Two\n\n- Dash\n* Star",
+            "Trailing newlines\n\n",
+        ]
+
+        for markdown in markdowns:
+            with self.subTest(markdown=markdown):
+                # Act
+                _, blocks = scan_markdown(markdown)
+
+                # Assert
+                self.assertListEqual(
+                    markdown_to_blocks(markdown),
+                    [block for block, _ in blocks],
+                )
+                self.assertListEqual(
+                    [block_to_block_type(block) for block, _ in blocks],
+                    [block_type for _, block_type in blocks],
+                )
+
+    def test_scan_markdown_no_title(self):
+        # Act
+        title, _ = scan_markdown("## No title")
+
+        # Assert
+        self.assertIsNone(title)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,118 @@
+import gzip
+import os
+import unittest
+
+from compress import compress_outputs, remove_stale_sidecars
+from temp_tree import TempTreeTestCase
+
+
+class TestCompress(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.build_dir = self.temp_dir.name
+        self.write("index.html", "<h1>Home</h1>" * 100)
+        self.write("blog/post.html", "<p>Post</p>" * 100)
+        self.write("index.css", "body { margin: 0; }")
+        self.write("images/tom.png", "png")
+
+    def test_compress_outputs_writes_gzip_sidecars(self):
+        # Act
+        stats = compress_outputs(self.build_dir)
+
+        # Assert
+        self.assertEqual(3, stats["compressed"])
+        self.assertLess(stats[".gz"], stats["input"])
+        with gzip.open(self.path("index.html.gz"), "rt") as f:
+            self.assertEqual("<h1>Home</h1>" * 100, f.read())
+        self.assertFalse(os.path.exists(self.path("images/tom.png.gz")))
+
+    def test_compress_outputs_skips_unchanged_files(self):
+        # Arrange
+        compress_outputs(self.build_dir)
+        self.write("index.css", "body { margin: 1em; }")
+
+        # Act
+        stats = compress_outputs(self.build_dir)
+
+        # Assert
+        self.assertEqual(1, stats["compressed"])
+        self.assertEqual(2, stats["unchanged"])
+        with gzip.open(self.path("index.css.gz"), "rt") as f:
+            self.assertEqual("body { margin: 1em; }", f.read())
+
+    def test_compress_outputs_removes_sidecars_of_removed_files(self):
+        # Arrange
+        compress_outputs(self.build_dir)
+        os.remove(self.path("blog/post.html"))
+
+        # Act
+        stats = compress_outputs(self.build_dir)
+
+        # Assert
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(self.path("blog/post.html.gz")))
+
+    def test_remove_stale_sidecars_removes_sidecars_of_changed_files(self):
+        # Arrange
+        compress_outputs(self.build_dir)
+        self.write("index.html", "<h1>Edited</h1>")
+
+        # Act
+        removed = remove_stale_sidecars(self.build_dir)
+
+        # Assert
+        self.assertEqual(1, removed)
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+        self.assertTrue(os.path.exists(self.path("index.css.gz")))
+
+    def test_copied_sidecars_with_new_mtimes_are_kept(self):
+        # Arrange
+        compress_outputs(self.build_dir)
+        sidecar = self.path("index.html.gz")
+        os.utime(sidecar, ns=(0, 0))
+
+        # Act
+        removed = remove_stale_sidecars(self.build_dir)
+        stats = compress_outputs(self.build_dir)
+
+        # Assert
+        self.assertEqual(0, removed)
+        self.assertEqual(0, stats["compressed"])
+        self.assertEqual(
+            os.stat(self.path("index.html")).st_mtime_ns,
+            os.stat(sidecar).st_mtime_ns,
+        )
+
+    def test_sidecars_of_unavailable_formats_are_removed_when_stale(self):
+        # Arrange
+        compress_outputs(self.build_dir)
+        self.write("index.css.br", "old brotli output")
+        self.write("archive.tar.gz", "not a sidecar")
+
+        # Act
+        stats = compress_outputs(self.build_dir)
+
+        # Assert
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(self.path("index.css.br")))
+        self.assertTrue(os.path.exists(self.path("archive.tar.gz")))
+
+    def test_parallel_compression_matches_serial_compression(self):
+        # Arrange
+        compress_outputs(self.build_dir)
+        with open(self.path("index.html.gz"), "rb") as f:
+            serial = f.read()
+        os.remove(self.path("index.html.gz"))
+        os.remove(self.path("blog/post.html.gz"))
+
+        # Act
+        stats = compress_outputs(self.build_dir, workers=4)
+
+        # Assert
+        self.assertEqual(2, stats["compressed"])
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(serial, f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import unittest
+
+from copy_static import (
+    COPY_STRATEGIES,
+    PARALLEL_COPY_MIN_FILES,
+    copy_file,
+    copy_files_recursive,
+)
+from manifest import BuildManifest
+from temp_tree import TempTreeTestCase
+
+
+class TestCopyStatic(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_dir = self.path("static")
+        self.build_dir = self.path("docs")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.svg", "<svg/>")
+        self.write("static/images/old.png", "png")
+
+    def sync(self, clean=False):
+        manifest = BuildManifest(self.build_dir)
+        stats = copy_files_recursive(
+            self.static_dir,
+            self.build_dir,
+            clean,
+            manifest,
+        )
+        manifest.save()
+        return stats
+
+    def test_sync_copies_only_new_and_changed_files(self):
+        # Arrange
+        self.sync(clean=True)
+        self.write("static/index.css", "body { margin: 0; }")
+        self.write("static/fonts/serif.woff", "font")
+
+        # Act
+        stats = self.sync()
+
+        # Assert
+        self.assertEqual(2, stats["copied"])
+        self.assertEqual(2, stats["unchanged"])
+        with open(self.path("docs/index.css")) as f:
+            self.assertEqual("body { margin: 0; }", f.read())
+        self.assertTrue(os.path.isfile(self.path("docs/fonts/serif.woff")))
+
+    def test_sync_deletes_only_removed_static_files(self):
+        # Arrange
+        self.sync(clean=True)
+        self.write("docs/index.html", "<html></html>")
+        os.remove(self.path("static/images/old.png"))
+
+        # Act
+        stats = self.sync()
+
+        # Assert
+        self.assertEqual(1, stats["deleted"])
+        self.assertFalse(os.path.exists(self.path("docs/images/old.png")))
+        self.assertTrue(os.path.isfile(self.path("docs/images/logo.svg")))
+        self.assertTrue(os.path.isfile(self.path("docs/index.html")))
+
+    def test_sync_restores_deleted_outputs(self):
+        # Arrange
+        self.sync(clean=True)
+        os.remove(self.path("docs/index.css"))
+
+        # Act
+        stats = self.sync()
+
+        # Assert
+        self.assertEqual(1, stats["copied"])
+        self.assertTrue(os.path.isfile(self.path("docs/index.css")))
+
+    def test_copy_strategies_copy_the_same_bytes(self):
+        # Arrange
+        source = self.path("static/index.css")
+
+        for strategy in COPY_STRATEGIES:
+            with self.subTest(strategy=strategy):
+                dest = self.path(f"docs/{strategy}.css")
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+                # Act
+                copy_file(source, dest, strategy)
+
+                # Assert
+                with open(dest) as f:
+                    self.assertEqual("body {}", f.read())
+
+    def test_reflink_strategy_never_copies_in_kernel(self):
+        # Arrange
+        source = self.path("static/index.css")
+        dest = self.path("docs/index.css")
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        # Act
+        used = copy_file(source, dest, "reflink")
+
+        # Assert
+        self.assertIn(used, ("reflink", "copy"))
+
+    def test_copy_over_a_hardlink_leaves_the_source_alone(self):
+        # Arrange
+        source = self.path("static/index.css")
+        dest = self.path("docs/index.css")
+        os.makedirs(os.path.dirname(dest))
+        copy_file(source, dest, "hardlink")
+        self.write("static/other.css", "p {}")
+
+        # Act
+        copy_file(self.path("static/other.css"), dest, "range")
+
+        # Assert
+        with open(source) as f:
+            self.assertEqual("body {}", f.read())
+        with open(dest) as f:
+            self.assertEqual("p {}", f.read())
+
+    def test_parallel_copy_matches_serial_copy(self):
+        # Arrange
+        for i in range(PARALLEL_COPY_MIN_FILES):
+            self.write(f"static/many/{i}.txt", str(i) * i)
+
+        # Act
+        stats = copy_files_recursive(
+            self.static_dir,
+            self.build_dir,
+            workers=4,
+        )
+
+        # Assert
+        self.assertEqual(PARALLEL_COPY_MIN_FILES + 3, stats["copied"])
+        for i in range(PARALLEL_COPY_MIN_FILES):
+            with open(self.path(f"docs/many/{i}.txt")) as f:
+                self.assertEqual(str(i) * i, f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import unittest
+
+from file_walker import walk_files
+from generate_html import find_pages
+from temp_tree import TempTreeTestCase
+
+
+class TestFileWalker(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("b.md", "a.css", "blog/post.md", "blog/v1.2/notes.md"):
+            self.write(f"src/{name}", name)
+
+    def test_walk_files(self):
+        # Arrange
+        source = self.path("src")
+
+        # Act
+        result = list(walk_files(source, "out"))
+
+        # Assert
+        self.assertListEqual(
+            [
+                (os.path.join(source, "a.css"), os.path.join("out", "a.css")),
+                (os.path.join(source, "b.md"), os.path.join("out", "b.md")),
+                (os.path.join(source, "blog", "post.md"),
+                 os.path.join("out", "blog", "post.md")),
+                (os.path.join(source, "blog", "v1.2", "notes.md"),
+                 os.path.join("out", "blog", "v1.2", "notes.md")),
+            ],
+            result,
+        )
+
+    def test_walk_files_renames_files_and_directories(self):
+        # Arrange
+        source = self.path("src", "blog")
+
+        # Act
+        result = list(
+            walk_files(source, "out", lambda name: os.path.splitext(name)[0])
+        )
+
+        # Assert
+        self.assertListEqual(
+            [os.path.join("out", "post"), os.path.join("out", "v1", "notes")],
+            [dest for _, dest in result],
+        )
+
+    def test_walk_files_missing_directory(self):
+        # Act
+        with self.assertRaises(IOError) as error:
+            list(walk_files("missing", "out"))
+
+        # Assert
+        self.assertEqual(
+            "Source directory 'missing' does not exist",
+            str(error.exception),
+        )
+
+    def test_walk_files_rejects_dangling_symlinks(self):
+        # Arrange
+        source = self.path("src")
+        os.symlink("/nonexistent", os.path.join(source, ".#b.md"))
+
+        # Act
+        with self.assertRaises(IOError) as error:
+            list(walk_files(source, "out"))
+
+        # Assert
+        self.assertIn("neither a file nor a directory", str(error.exception))
+
+    def test_find_pages_skips_dangling_symlinks(self):
+        # Arrange
+        source = self.path("src")
+        os.symlink("/nonexistent", os.path.join(source, ".#b.md"))
+
+        # Act
+        result = find_pages(source, "out")
+
+        # Assert
+        self.assertListEqual(
+            [
+                os.path.join("out", "b.html"),
+                os.path.join("out", "blog", "post.html"),
+                os.path.join("out", "blog", "v1", "notes.html"),
+            ],
+            [dest for _, dest in result],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import unittest
+
+from copy_static import copy_files_recursive
+from fingerprint import (
+    HashCache,
+    fingerprint_assets,
+    fingerprint_name,
+    rewrite_asset_urls,
+)
+from generate_html import generate_pages_recursive, read_file
+from manifest import BuildManifest
+from temp_tree import TempTreeTestCase
+
+TEMPLATE = ('<link href="/index.css"/><title>{{ Title }}</title>'
+            "{{ Content }}")
+
+
+class TestFingerprint(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_dir = self.path("static")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/tom.png", "png")
+        self.write("static/robots.txt", "User-agent: *")
+
+    def test_fingerprint_name(self):
+        # Act
+        result = fingerprint_name("/images/tom.png", "0123456789abcdef")
+
+        # Assert
+        self.assertEqual("/images/tom.0123456789.png", result)
+
+    def test_rewrite_asset_urls_only_rewrites_known_assets(self):
+        # Arrange
+        assets = {"/index.css": "/index.abc.css"}
+        html = '<link href="/index.css"/><a href="/blog">Blog</a>'
+
+        # Act
+        result = rewrite_asset_urls(html, assets)
+
+        # Assert
+        self.assertEqual(
+            '<link href="/index.abc.css"/><a href="/blog">Blog</a>',
+            result,
+        )
+
+    def test_fingerprint_assets_skips_fixed_names(self):
+        # Act
+        assets = fingerprint_assets(self.static_dir, HashCache())
+
+        # Assert
+        self.assertListEqual(["/images/tom.png", "/index.css"], sorted(assets))
+        self.assertRegex(assets["/index.css"], r"^/index\.[0-9a-f]{10}\.css$")
+
+    def test_hash_cache_reuses_digests_of_unchanged_files(self):
+        # Arrange
+        cache_path = self.path("cache/hashes.json")
+        cache = HashCache(cache_path)
+        first = fingerprint_assets(self.static_dir, cache)
+        cache.save()
+        cache = HashCache(cache_path)
+
+        # Act
+        second = fingerprint_assets(self.static_dir, cache)
+        self.write("static/index.css", "body { margin: 0; }")
+        third = fingerprint_assets(self.static_dir, cache)
+
+        # Assert
+        self.assertEqual(first, second)
+        self.assertNotEqual(first["/index.css"], third["/index.css"])
+        self.assertEqual(first["/images/tom.png"], third["/images/tom.png"])
+
+    def test_build_links_pages_to_fingerprinted_assets(self):
+        # Arrange
+        template = self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\n![Tom](/images/tom.png)")
+        build_dir = self.path("docs")
+        manifest = BuildManifest(build_dir)
+        assets = fingerprint_assets(self.static_dir, HashCache())
+
+        # Act
+        copy_files_recursive(
+            self.static_dir,
+            build_dir,
+            manifest=manifest,
+            assets=assets,
+        )
+        generate_pages_recursive(
+            self.path("content"),
+            template,
+            build_dir,
+            "/base/",
+            manifest=manifest,
+            assets=assets,
+        )
+
+        # Assert
+        html = read_file(self.path("docs/index.html"))
+        self.assertIn(f'href="/base{assets["/index.css"]}"', html)
+        self.assertIn(f'src="/base{assets["/images/tom.png"]}"', html)
+        self.assertTrue(os.path.isfile(build_dir + assets["/index.css"]))
+        self.assertTrue(os.path.isfile(self.path("docs/robots.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import os
+import unittest
+
+from block_handlers import clear_inline_cache, inline_cache_counts
+from generate_html import (
+    generate_page,
+    generate_pages_recursive,
+    generate_page_streaming,
+    read_file,
+    read_lines,
+    write_file,
+)
+from render_cache import RenderCache
+from temp_tree import TempTreeTestCase
+from template import load_template
+
+TEMPLATE = ('<title>{{ Title }}</title><link href="/index.css"/>'
+            "<article>{{ Content }}</article>")
+
+MARKDOWN = """# Page title
+
+Paragraph with a [link](/blog/post) and ![image](/images/tom.png)
+
+- First
+- Second
+
+```
+code with href="/raw"
+```
+"""
+
+
+class TestGenerateHtml(TempTreeTestCase):
+    def test_read_lines_matches_split(self):
+        # Arrange
+        contents = ["", "one line", "trailing\n", "a\n\nb\n\n\n", "\n"]
+
+        for content in contents:
+            with self.subTest(content=content):
+                path = self.write("lines.md", content)
+
+                # Act
+                result = list(read_lines(path))
+
+                # Assert
+                self.assertListEqual(content.split("\n"), result)
+
+    def test_generate_page_streaming_matches_generate_page(self):
+        # Arrange
+        source = self.write("page.md", MARKDOWN)
+        template = self.write("template.html", TEMPLATE)
+        expected_path = self.path("out", "a.html")
+        result_path = self.path("out", "b.html")
+        generate_page(source, template, expected_path, "/base/")
+
+        # Act
+        generate_page_streaming(
+            source,
+            load_template(template, "/base/"),
+            result_path,
+        )
+
+        # Assert
+        self.assertEqual(read_file(expected_path), read_file(result_path))
+        self.assertIn('href="/base/blog/post"', read_file(result_path))
+
+    def test_generate_pages_parallel_matches_serial(self):
+        # Arrange
+        template = self.write("template.html", TEMPLATE)
+        content_dir = self.path("content")
+        for name in ("a", "b", "c"):
+            self.write(f"content/{name}/index.md", MARKDOWN)
+        serial_dir = self.path("serial")
+        generate_pages_recursive(content_dir, template, serial_dir, "/")
+
+        for executor in ("process", "thread"):
+            with self.subTest(executor=executor):
+                parallel_dir = self.path(executor)
+
+                # Act
+                stats = generate_pages_recursive(
+                    content_dir,
+                    template,
+                    parallel_dir,
+                    "/",
+                    RenderCache(),
+                    jobs=2,
+                    executor=executor,
+                )
+
+                # Assert
+                self.assertEqual(3, stats["generated"])
+                for name in ("a", "b", "c"):
+                    self.assertEqual(
+                        read_file(
+                            os.path.join(serial_dir, name, "index.html")
+                        ),
+                        read_file(
+                            os.path.join(parallel_dir, name, "index.html")
+                        ),
+                    )
+
+    def test_process_workers_send_new_renders_back(self):
+        # Arrange
+        template = self.write("template.html", TEMPLATE)
+        content_dir = self.path("content")
+        for name in ("a", "b"):
+            self.write(f"content/{name}/index.md", MARKDOWN)
+        cache = RenderCache()
+        clear_inline_cache()
+
+        # Act
+        generate_pages_recursive(
+            content_dir,
+            template,
+            self.path("out"),
+            "/",
+            cache,
+            jobs=2,
+            executor="process",
+        )
+
+        # Assert
+        self.assertEqual(4, len(cache.entries))
+        self.assertEqual(8, cache.hits + cache.misses)
+        self.assertLess(0, sum(inline_cache_counts()))
+
+    def test_write_file_skips_identical_content(self):
+        # Arrange
+        path = self.path("out", "page.html")
+
+        # Act
+        results = [
+            write_file(path, "<p>one</p>"),
+            write_file(path, "<p>one</p>"),
+            write_file(path, "<p>two</p>"),
+        ]
+
+        # Assert
+        self.assertListEqual(["new", "identical", "updated"], results)
+        self.assertEqual("<p>two</p>", read_file(path))
+        self.assertListEqual(["page.html"], os.listdir(os.path.dirname(path)))
+
+    def test_write_file_removes_its_temp_file_when_writing_fails(self):
+        # Arrange
+        path = self.write("out/page.html", "<p>one</p>")
+
+        # Act
+        with self.assertRaises(UnicodeEncodeError):
+            write_file(path, "<p>\ud800</p>")
+
+        # Assert
+        self.assertEqual("<p>one</p>", read_file(path))
+        self.assertListEqual(["page.html"], os.listdir(os.path.dirname(path)))
+
+    def test_generate_page_keeps_identical_outputs_untouched(self):
+        # Arrange
+        source = self.write("page.md", MARKDOWN)
+        template = self.write("template.html", TEMPLATE)
+        template_obj = load_template(template)
+        paths = [
+            self.path("out", name)
+            for name in ("page.html", "streamed.html")
+        ]
+        generate_page(source, template, paths[0], "/")
+        generate_page_streaming(source, template_obj, paths[1])
+        for path in paths:
+            os.utime(path, ns=(0, 0))
+
+        # Act
+        results = [
+            generate_page(source, template, paths[0], "/"),
+            generate_page_streaming(source, template_obj, paths[1]),
+        ]
+
+        # Assert
+        self.assertListEqual(["identical", "identical"], results)
+        for path in paths:
+            self.assertEqual(0, os.stat(path).st_mtime_ns)
+        self.assertListEqual(
+            ["page.html", "streamed.html"],
+            sorted(os.listdir(os.path.dirname(paths[0]))),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
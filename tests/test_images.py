@@ -0,0 +1,168 @@
+import os
+import struct
+import unittest
+import zlib
+
+from copy_static import copy_files_recursive
+from fingerprint import AssetMap, HashCache, rewrite_asset_urls
+from images import (
+    PNG_SIGNATURE,
+    Image,
+    ImagePipeline,
+    png_chunk,
+    read_png_chunks,
+    recompress_png,
+)
+from manifest import BuildManifest
+from temp_tree import TempTreeTestCase
+
+
+def make_png(width=64, height=64):
+    # Uncompressed gradient with a text chunk and a transparency chunk
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    rows = b"".join(
+        b"\x00" + b"".join(
+            bytes((x * 4 % 256, y * 4 % 256, 128)) for x in range(width)
+        )
+        for y in range(height)
+    )
+    return b"".join([
+        PNG_SIGNATURE,
+        png_chunk(b"IHDR", header),
+        png_chunk(b"tEXt", b"Comment\x00made by hand"),
+        png_chunk(b"tRNS", b"\x00\x00\x00\x00\x00\x00"),
+        png_chunk(b"IDAT", zlib.compress(rows, 0)),
+        png_chunk(b"IEND", b""),
+    ])
+
+
+def pixels(data):
+    return zlib.decompress(b"".join(
+        body for chunk_type, body in read_png_chunks(data)
+        if chunk_type == b"IDAT"
+    ))
+
+
+class TestImages(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_dir = self.path("static")
+        self.build_dir = self.path("docs")
+        self.image = self.path("static/images/tom.png")
+        os.makedirs(os.path.dirname(self.image))
+        with open(self.image, "wb") as f:
+            f.write(make_png())
+        with open(self.path("static/index.css"), "w") as f:
+            f.write("body {}")
+
+    def sync(self, clean=False):
+        manifest = BuildManifest(self.build_dir)
+        images = ImagePipeline(self.path("cache"), HashCache())
+        stats = copy_files_recursive(
+            self.static_dir,
+            self.build_dir,
+            clean,
+            manifest,
+            images=images,
+        )
+        manifest.save()
+        return stats
+
+    def test_recompress_png_keeps_pixels_and_drops_metadata(self):
+        # Arrange
+        data = make_png()
+
+        # Act
+        result = recompress_png(data)
+
+        # Assert
+        chunk_types = [chunk_type for chunk_type, _ in read_png_chunks(result)]
+        self.assertLess(len(result), len(data))
+        self.assertEqual(pixels(data), pixels(result))
+        self.assertListEqual([b"IHDR", b"tRNS", b"IDAT", b"IEND"], chunk_types)
+
+    def test_recompress_png_returns_other_files_unchanged(self):
+        # Act
+        result = recompress_png(b"not a png")
+
+        # Assert
+        self.assertEqual(b"not a png", result)
+
+    def test_sync_writes_optimized_images_and_copies_other_files(self):
+        # Act
+        self.sync(clean=True)
+
+        # Assert
+        with open(self.path("docs/images/tom.png"), "rb") as f:
+            output = f.read()
+        self.assertEqual(recompress_png(make_png()), output)
+        self.assertTrue(os.path.isfile(self.path("docs/index.css")))
+
+    def test_derivatives_are_cached_by_content(self):
+        # Arrange
+        self.sync(clean=True)
+        derivatives = os.listdir(self.path("cache"))
+        mtimes = [
+            os.stat(self.path(f"cache/{name}")).st_mtime_ns
+            for name in derivatives
+        ]
+
+        # Act
+        self.sync(clean=True)
+
+        # Assert
+        self.assertListEqual(derivatives, os.listdir(self.path("cache")))
+        self.assertListEqual(mtimes, [
+            os.stat(self.path(f"cache/{name}")).st_mtime_ns
+            for name in derivatives
+        ])
+
+    def test_second_sync_leaves_optimized_images_alone(self):
+        # Arrange
+        self.sync(clean=True)
+
+        # Act
+        stats = self.sync()
+
+        # Assert
+        self.assertEqual(0, stats["copied"])
+        self.assertEqual(2, stats["unchanged"])
+
+    def test_rewrite_asset_urls_adds_srcset_to_images(self):
+        # Arrange
+        assets = AssetMap(srcsets={
+            "/images/tom.png": [
+                ("/images/tom.480w.png", 480),
+                ("/images/tom.png", 1200),
+            ],
+        })
+        html = '<img src="/images/tom.png" alt="Tom"><img src="/a.png">'
+
+        # Act
+        result = rewrite_asset_urls(html, assets, "/base/")
+
+        # Assert
+        self.assertEqual(
+            '<img src="/images/tom.png" srcset="/base/images/tom.480w.png '
+            '480w, /base/images/tom.png 1200w" alt="Tom"><img src="/a.png">',
+            result,
+        )
+
+    @unittest.skipUnless(Image, "Pillow is not installed")
+    def test_sync_writes_narrower_variants(self):
+        # Arrange
+        with open(self.image, "wb") as f:
+            f.write(make_png(width=1000, height=10))
+
+        # Act
+        self.sync(clean=True)
+
+        # Assert
+        for width in (480, 960):
+            path = self.path(f"docs/images/tom.{width}w.png")
+            with Image.open(path) as image:
+                self.assertEqual(width, image.width)
+
+
+if __name__ == "__main__":
+    unittest.main()
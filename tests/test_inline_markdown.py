@@ -2,6 +2,7 @@ import unittest
 from textnode import TextNode, TextType
 from inline_markdown import (
     text_to_textnodes,
+    text_to_textnodes_multipass,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
@@ -42,6 +43,56 @@ class TestInlineMarkdown(unittest.TestCase):
             result,
         )
 
+    def test_text_to_textnodes_matches_multipass(self):
+        # Arrange
+        texts = [
+            "",
+            "Plain text",
+            "**bold** and *italic* and _italic_ and `code`",
+            "**bold with *star* and _underscore_ inside**",
+            "*italic with `code` inside*",
+            "_italic with `code` inside_",
+            "`code with ![image](url) inside`",
+            "a****b",
+            "***bold italic***b*",
+            "![alt](img)[link](url)![](empty)",
+            "!![alt](img) ![not image] [a](b(c))",
+            "[outer [inner](url)](url)",
+        ]
+
+        for text in texts:
+            with self.subTest(text=text):
+                # Act
+                result = text_to_textnodes(text)
+
+                # Assert
+                self.assertListEqual(text_to_textnodes_multipass(text), result)
+
+    def test_text_to_textnodes_error_matches_multipass(self):
+        # Arrange
+        texts = [
+            "Text without **closing delimiter",
+            "*italic **bold** italic*",
+            "`code *with* stars`",
+            "_one_ and _two",
+            "`unclosed code and **bold",
+        ]
+
+        for text in texts:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError) as expected:
+                    text_to_textnodes_multipass(text)
+
+                # Act
+                with self.assertRaises(ValueError) as error:
+                    text_to_textnodes(text)
+
+                # Assert
+                self.assertEqual(
+                    str(expected.exception),
+                    str(error.exception),
+                )
+
     def test_split_nodes_delimiter_single_node(self):
         # Arrange
         node = TextNode("Text with **bold phrase** inside", TextType.TEXT)
@@ -0,0 +1,120 @@
+import os
+import unittest
+
+from generate_html import generate_pages_recursive
+from manifest import BuildManifest
+from temp_tree import PAGE_TEMPLATE, TempTreeTestCase
+
+
+class TestBuildManifest(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content_dir = self.path("content")
+        self.build_dir = self.path("docs")
+        self.template = self.write("template.html", PAGE_TEMPLATE)
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post.md", "# Post\n\nSome text")
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest(self.build_dir)
+        stats = generate_pages_recursive(
+            self.content_dir,
+            self.template,
+            self.build_dir,
+            basepath,
+            manifest=manifest,
+        )
+        manifest.save()
+        return stats
+
+    def test_first_build_generates_every_page(self):
+        # Act
+        stats = self.build()
+
+        # Assert
+        manifest = BuildManifest(self.build_dir)
+        self.assertEqual(2, stats["generated"])
+        self.assertTrue(manifest.exists)
+        self.assertEqual(
+            self.path(".cache/manifests/docs.json"),
+            manifest.path,
+        )
+        self.assertListEqual(["blog", "index.html"],
+                             sorted(os.listdir(self.build_dir)))
+
+    def test_rebuild_skips_unchanged_pages(self):
+        # Arrange
+        self.build()
+        self.write("content/blog/post.md", "# Post\n\nEdited text")
+
+        # Act
+        stats = self.build()
+
+        # Assert
+        self.assertEqual(1, stats["generated"])
+        self.assertEqual(1, stats["unchanged"])
+
+    def test_touched_page_with_same_content_is_unchanged(self):
+        # Arrange
+        self.build()
+        path = self.path("content/index.md")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+        # Act
+        stats = self.build()
+
+        # Assert
+        self.assertEqual(0, stats["generated"])
+        self.assertEqual(2, stats["unchanged"])
+
+    def test_basepath_change_regenerates_every_page(self):
+        # Arrange
+        self.build()
+
+        # Act
+        stats = self.build("/base/")
+
+        # Assert
+        self.assertEqual(2, stats["generated"])
+
+    def test_deleted_source_removes_output(self):
+        # Arrange
+        self.build()
+        os.remove(self.path("content/blog/post.md"))
+
+        # Act
+        stats = self.build()
+
+        # Assert
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(os.path.join(self.build_dir, "blog")))
+
+    def test_template_change_still_removes_deleted_pages(self):
+        # Arrange
+        self.build()
+        os.remove(self.path("content/blog/post.md"))
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+
+        # Act
+        stats = self.build()
+
+        # Assert
+        self.assertEqual(1, stats["generated"])
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(os.path.join(self.build_dir, "blog")))
+
+    def test_missing_output_is_regenerated(self):
+        # Arrange
+        self.build()
+        os.remove(os.path.join(self.build_dir, "index.html"))
+
+        # Act
+        stats = self.build()
+
+        # Assert
+        self.assertEqual(1, stats["generated"])
+
+
+if __name__ == "__main__":
+    unittest.main()
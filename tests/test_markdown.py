@@ -1,6 +1,6 @@
 import unittest
 
-from markdown import markdown_to_html_node, extract_title
+from markdown import markdown_to_html_node, extract_title, parse_markdown
 
 
 class TestMarkdown(unittest.TestCase):
@@ -171,5 +171,27 @@ This is markdown
         self.assertEqual("No title found for markdown", str(error.exception))
 
 
+    def test_parse_markdown(self):
+        # Arrange
+        md = "# The title\n\nSome *text*"
+
+        # Act
+        title, node = parse_markdown(md)
+
+        # Assert
+        self.assertEqual("The title", title)
+        self.assertEqual(
+            "<div><h1>The title</h1><p>Some <i>text</i></p></div>",
+            node.to_html(),
+        )
+
+    def test_parse_markdown_no_title(self):
+        # Act
+        with self.assertRaises(ValueError) as error:
+            parse_markdown("## No title\n\nUnclosed **bold")
+
+        # Assert
+        self.assertEqual("No title found for markdown", str(error.exception))
+
 if __name__ == "__main__":
     unittest.main()
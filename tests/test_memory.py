@@ -0,0 +1,78 @@
+import tracemalloc
+import unittest
+
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, text_node_to_html_node
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictLeafNode:
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = []
+        self.props = props or {}
+
+
+def synthetic_document(paragraph_count):
+    paragraph = ("Text with **bold**, *italic*, `code`, "
+                 "![image](/images/image.png) and [link](/link) ")
+    return [paragraph * 4 for _ in range(paragraph_count)]
+
+
+def peak_memory(build):
+    tracemalloc.start()
+    try:
+        nodes = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del nodes
+    return peak
+
+
+class TestMemory(unittest.TestCase):
+    def test_slotted_nodes_reduce_peak_memory(self):
+        # Arrange
+        paragraphs = synthetic_document(500)
+        tokens = [
+            (node.text, node.text_type, node.url)
+            for paragraph in paragraphs
+            for node in text_to_textnodes(paragraph)
+        ]
+
+        def build_dict_nodes():
+            return [
+                (DictTextNode(text, text_type, url),
+                 DictLeafNode(None, text))
+                for text, text_type, url in tokens
+            ]
+
+        def build_slotted_nodes():
+            nodes = []
+            for text, text_type, url in tokens:
+                text_node = TextNode(text, text_type, url)
+                nodes.append((text_node, text_node_to_html_node(text_node)))
+            return nodes
+
+        # Act
+        dict_peak = peak_memory(build_dict_nodes)
+        slotted_peak = peak_memory(build_slotted_nodes)
+
+        # Assert
+        self.assertLess(
+            slotted_peak,
+            dict_peak * 0.75,
+            f"Peak memory {slotted_peak} bytes with slotted nodes vs "
+            f"{dict_peak} bytes with per-instance dicts",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
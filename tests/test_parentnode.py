@@ -1,5 +1,7 @@
+import io
+import sys
 import unittest
-from parentnode import ParentNode
+from parentnode import ParentNode, write_html
 from leafnode import LeafNode
 
 
@@ -136,6 +138,47 @@ class TestParentNode(unittest.TestCase):
             result,
         )
 
+    def test_to_html_deeply_nested(self):
+        # Arrange
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode("b", "deep")
+        for _ in range(depth):
+            node = ParentNode("span", [node])
+
+        # Act
+        result = node.to_html()
+
+        # Assert
+        self.assertEqual(
+            "<span>" * depth + "<b>deep</b>" + "</span>" * depth,
+            result,
+        )
+
+    def test_to_html_nested_child_without_children(self):
+        # Arrange
+        node = ParentNode("div", [LeafNode("p", "Hi"), ParentNode("ul", [])])
+
+        # Act
+        with self.assertRaises(ValueError) as error:
+            node.to_html()
+
+        # Assert
+        self.assertEqual(
+            "ParentNode must have at least one child node",
+            str(error.exception),
+        )
+
+    def test_write_html_to_file_object(self):
+        # Arrange
+        node = ParentNode("div", [LeafNode("p", "Hi"), LeafNode(None, "!")])
+        out = io.StringIO()
+
+        # Act
+        write_html(node, out.write)
+
+        # Assert
+        self.assertEqual(node.to_html(), out.getvalue())
+
     def test_repr(self):
         # Arrange
         tag = "div"
@@ -0,0 +1,52 @@
+import os
+import tracemalloc
+import unittest
+
+import generate_html
+from generate_html import generate_pages_recursive
+from profiler import BuildProfiler
+from temp_tree import PAGE_TEMPLATE, TempTreeTestCase
+
+
+class TestBuildProfiler(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_profiler_records_phases_per_page(self):
+        # Arrange
+        template = self.write("template.html", PAGE_TEMPLATE)
+        self.write("content/index.md", "# Home\n\nSome **bold** text")
+        self.write("content/long.md", "# Long\n\n" + "- *item*\n" * 200)
+        original_generate_page = generate_html.generate_page
+        profiler = BuildProfiler()
+
+        # Act
+        profiler.install()
+        try:
+            generate_pages_recursive(
+                self.path("content"),
+                template,
+                self.path("docs"),
+                "/",
+            )
+        finally:
+            profiler.uninstall()
+        profiler.save(self.path("profile.json"))
+
+        # Assert
+        self.assertIs(original_generate_page, generate_html.generate_page)
+        self.assertFalse(tracemalloc.is_tracing())
+        for phase in ("walk", "read_file", "markdown_to_blocks", "classify",
+                      "inline", "to_html", "template", "write_file"):
+            self.assertIn(phase, profiler.phases)
+        self.assertEqual(2, profiler.phases["read_file"]["calls"])
+        slowest = profiler.slowest_pages(1)
+        self.assertEqual(self.path("content/long.md"), slowest[0]["source"])
+        self.assertIn("inline", slowest[0]["phases"])
+        self.assertLess(0, slowest[0]["bytes"])
+        self.assertTrue(os.path.isfile(self.path("profile.json")))
+        self.assertIn("Slowest 1 pages:", profiler.summary(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+from markdown import markdown_to_html_node
+from render_cache import RenderCache
+from temp_tree import TempTreeTestCase
+
+MARKDOWN = """# Heading
+
+Paragraph with **bold** text
+
+- Item one
+- Item two
+"""
+
+
+class TestRenderCache(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.path("cache", "render.json")
+
+    def test_cached_render_matches_uncached(self):
+        # Arrange
+        cache = RenderCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+
+        # Act
+        first = markdown_to_html_node(MARKDOWN, cache).to_html()
+        second = markdown_to_html_node(MARKDOWN, cache).to_html()
+
+        # Assert
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, second)
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(3, cache.hits)
+
+    def test_cache_persists_between_builds(self):
+        # Arrange
+        cache = RenderCache(self.cache_path)
+        markdown_to_html_node(MARKDOWN, cache)
+        cache.save()
+
+        # Act
+        reloaded = RenderCache(self.cache_path)
+        markdown_to_html_node(MARKDOWN, reloaded)
+
+        # Assert
+        self.assertEqual(3, reloaded.hits)
+        self.assertEqual(0, reloaded.misses)
+
+    def test_cache_evicts_least_recently_used(self):
+        # Arrange
+        cache = RenderCache(max_entries=2)
+        cache.put("first", "<p>first</p>")
+        cache.put("second", "<p>second</p>")
+        cache.get("first")
+
+        # Act
+        cache.put("third", "<p>third</p>")
+
+        # Assert
+        self.assertEqual("<p>first</p>", cache.get("first"))
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual("<p>third</p>", cache.get("third"))
+
+    def test_cache_evicts_to_stay_under_max_bytes(self):
+        # Arrange
+        cache = RenderCache(max_bytes=192)
+        for i in range(16):
+            cache.put(f"block {i}", f"<p>{i:05}</p>")
+
+        # Act
+        cache.put("block 16", "<p>00016</p>")
+
+        # Assert
+        self.assertIsNone(cache.get("block 0"))
+        self.assertEqual("<p>00001</p>", cache.get("block 1"))
+        self.assertEqual(192, cache.size)
+
+    def test_blocks_too_large_for_the_cache_are_not_stored(self):
+        # Arrange
+        cache = RenderCache(max_bytes=160)
+
+        # Act
+        cache.put("huge", "x" * 11)
+
+        # Assert
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual(0, cache.size)
+
+    def test_corrupt_cache_file_is_ignored(self):
+        # Arrange
+        self.write("cache/render.json", "not json")
+
+        # Act
+        cache = RenderCache(self.cache_path)
+
+        # Assert
+        self.assertEqual({}, cache.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import unittest
+
+from generate_html import generate_pages_recursive, read_file, shard_of
+from manifest import BuildManifest
+from shards import merge_shards, shard_dir_path
+from temp_tree import PAGE_TEMPLATE, TempTreeTestCase
+
+PAGES = ["index", "about", "blog/one", "blog/two", "blog/three", "contact"]
+
+
+class TestShards(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content_dir = self.path("content")
+        self.build_dir = self.path("docs")
+        self.template = self.write("template.html", PAGE_TEMPLATE)
+        for page in PAGES:
+            self.write(f"content/{page}.md", f"# {page}\n\nText of {page}")
+
+    def build(self, build_dir, shard=None):
+        manifest = BuildManifest(build_dir)
+        stats = generate_pages_recursive(
+            self.content_dir,
+            self.template,
+            build_dir,
+            "/",
+            manifest=manifest,
+            shard=shard,
+        )
+        manifest.save()
+        return stats
+
+    def build_shards(self, count):
+        return [
+            self.build(
+                shard_dir_path(self.build_dir, index, count),
+                (index, count),
+            )["generated"]
+            for index in range(count)
+        ]
+
+    def test_shard_of_is_stable_and_relative_to_the_source_dir(self):
+        # Act
+        first = shard_of("content/blog/one.md", "content", 4)
+        second = shard_of("/other/root/blog/one.md", "/other/root", 4)
+
+        # Assert
+        self.assertEqual(first, second)
+        self.assertIn(first, range(4))
+
+    def test_merge_shards_matches_a_single_build(self):
+        # Arrange
+        generated = self.build_shards(3)
+        self.build(self.path("single"))
+
+        # Act
+        pages, _ = merge_shards(self.content_dir, self.build_dir, 3)
+
+        # Assert
+        self.assertEqual(len(PAGES), sum(generated))
+        self.assertEqual(len(PAGES), pages)
+        self.assertEqual(
+            BuildManifest(self.path("single")).pages,
+            BuildManifest(self.build_dir).pages,
+        )
+        for page in PAGES:
+            self.assertEqual(
+                read_file(self.path(f"single/{page}.html")),
+                read_file(self.path(f"docs/{page}.html")),
+            )
+
+    def test_merge_shards_rejects_missing_and_duplicated_pages(self):
+        # Arrange
+        self.build_shards(2)
+        self.build(shard_dir_path(self.build_dir, 1, 2), (0, 2))
+
+        # Act
+        with self.assertRaises(ValueError) as error:
+            merge_shards(self.content_dir, self.build_dir, 2)
+
+        # Assert
+        self.assertIn("missing from every shard", str(error.exception))
+        self.assertIn("built by several shards", str(error.exception))
+        self.assertFalse(os.path.exists(self.build_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import os
+import unittest
+
+from temp_tree import TempTreeTestCase
+from template import Template, load_template
+
+TEMPLATE = ('<title>{{ Title }}</title><link href="/index.css"/>'
+            '<img src="/logo.png"/><article>{{ Content }}</article>')
+
+
+def replace_template(template, title, content, basepath):
+    html = template.replace("{{ Title }}", title)
+    html = html.replace("{{ Content }}", content)
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+
+class TestTemplate(TempTreeTestCase):
+    def test_render_matches_replace(self):
+        # Arrange
+        title = "Title"
+        content = '<div><a href="/blog">Blog</a><img src="/a.png"></div>'
+
+        for basepath in ("/", "/static_site_generator/"):
+            with self.subTest(basepath=basepath):
+                template = Template(TEMPLATE, basepath)
+
+                # Act
+                result = template.render(title, content)
+
+                # Assert
+                self.assertEqual(
+                    replace_template(TEMPLATE, title, content, basepath),
+                    result,
+                )
+
+    def test_static_segments_are_rebased_once(self):
+        # Act
+        template = Template(TEMPLATE, "/base/")
+
+        # Assert
+        self.assertEqual(["Title", "Content"], template.slots)
+        self.assertIn('href="/base/index.css"', template.segments[1])
+        self.assertIn('src="/base/logo.png"', template.segments[1])
+
+    def test_stream_matches_render(self):
+        # Arrange
+        template = Template(TEMPLATE, "/base/")
+        chunks = ["<div>", '<p><a href="/x">x</a></p>', "</div>"]
+        out = io.StringIO()
+
+        # Act
+        template.stream(out.write, "Title", iter(chunks))
+
+        # Assert
+        self.assertEqual(
+            template.render("Title", "".join(chunks)),
+            out.getvalue(),
+        )
+
+    def test_stream_requires_single_content_placeholder(self):
+        # Arrange
+        template = Template("{{ Content }}{{ Content }}")
+
+        # Act & Assert
+        self.assertRaises(
+            ValueError,
+            template.stream,
+            io.StringIO().write,
+            "Title",
+            iter([]),
+        )
+
+    def test_load_template_reloads_when_modified(self):
+        # Arrange
+        path = self.write("template.html", "<h1>{{ Title }}</h1>")
+        first = load_template(path)
+        stat = os.stat(path)
+        self.write("template.html", "<h2>{{ Title }}</h2>")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        # Act
+        cached = load_template(path)
+
+        # Assert
+        self.assertEqual("<h1>Title</h1>", first.render("Title", ""))
+        self.assertEqual("<h2>Title</h2>", cached.render("Title", ""))
+
+    def test_load_template_missing_file(self):
+        # Act
+        with self.assertRaises(IOError) as error:
+            load_template("missing/template.html")
+
+        # Assert
+        self.assertEqual(
+            "File 'missing/template.html' does not exist",
+            str(error.exception),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from block_handlers import configure_inline_cache, INLINE_CACHE_SIZE
+from inline_markdown import text_to_textnodes
+from markdown import markdown_to_html_node
+from render_cache import RenderCache
+
+
+def make_markdown(i):
+    return (f"# Page {i}\n\n"
+            f"Paragraph {i % 7} with **bold** and [link](/page/{i % 5})\n\n"
+            f"- Item {i % 3}\n- Shared item\n\n"
+            "> Shared *quote*")
+
+
+class TestThreadSafety(unittest.TestCase):
+    def setUp(self):
+        # A tiny inline cache makes threads evict each other's entries
+        configure_inline_cache(4)
+
+    def tearDown(self):
+        configure_inline_cache(INLINE_CACHE_SIZE)
+
+    def run_in_threads(self, func, inputs):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(func, inputs))
+
+    def test_text_to_textnodes_in_threads(self):
+        # Arrange
+        texts = [f"Text {i} with **bold** and `code`" for i in range(500)]
+        expected = [text_to_textnodes(text) for text in texts]
+
+        # Act
+        result = self.run_in_threads(text_to_textnodes, texts)
+
+        # Assert
+        self.assertListEqual(expected, result)
+
+    def test_markdown_to_html_in_threads(self):
+        # Arrange
+        markdowns = [make_markdown(i) for i in range(500)]
+        expected = [markdown_to_html_node(md).to_html() for md in markdowns]
+
+        # Act
+        result = self.run_in_threads(
+            lambda md: markdown_to_html_node(md).to_html(),
+            markdowns,
+        )
+
+        # Assert
+        self.assertListEqual(expected, result)
+
+    def test_shared_render_cache_in_threads(self):
+        # Arrange
+        cache = RenderCache(max_entries=8)
+        markdowns = [make_markdown(i) for i in range(500)]
+        expected = [markdown_to_html_node(md).to_html() for md in markdowns]
+
+        # Act
+        result = self.run_in_threads(
+            lambda md: markdown_to_html_node(md, cache).to_html(),
+            markdowns,
+        )
+
+        # Assert
+        self.assertListEqual(expected, result)
+        self.assertEqual(500 * 4, cache.hits + cache.misses)
+        self.assertLessEqual(len(cache.entries), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import os
+import signal
+import sys
+import threading
+import unittest
+
+from copy_static import copy_files_recursive
+from generate_html import generate_pages_recursive, read_file
+from manifest import BuildManifest
+from render_cache import RenderCache
+from temp_tree import PAGE_TEMPLATE, TempTreeTestCase
+from watch import (
+    InotifyWatcher,
+    changed_files,
+    rebuild_changes,
+    snapshot_files,
+    watch,
+)
+
+
+class TestWatch(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_dir = self.path("static")
+        self.content_dir = self.path("content")
+        self.build_dir = self.path("docs")
+        self.template = self.write("template.html", PAGE_TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post.md", "# Post\n\nSome text")
+        self.manifest = BuildManifest(self.build_dir)
+        self.render_cache = RenderCache()
+        copy_files_recursive(
+            self.static_dir,
+            self.build_dir,
+            manifest=self.manifest,
+        )
+        generate_pages_recursive(
+            self.content_dir,
+            self.template,
+            self.build_dir,
+            "/",
+            self.render_cache,
+            self.manifest,
+        )
+        self.manifest.save()
+
+    def rebuild(self, snapshot):
+        changed, removed = changed_files(snapshot, self.snapshot())
+        return rebuild_changes(
+            changed,
+            removed,
+            self.static_dir,
+            self.content_dir,
+            self.template,
+            self.build_dir,
+            "/",
+            self.manifest,
+            self.render_cache,
+        )
+
+    def snapshot(self):
+        return snapshot_files(
+            (self.static_dir, self.content_dir, self.template)
+        )
+
+    def test_sigterm_stops_watching(self):
+        # Arrange
+        timer = threading.Timer(
+            0.1,
+            os.kill,
+            (os.getpid(), signal.SIGTERM),
+        )
+        handler = signal.getsignal(signal.SIGTERM)
+
+        # Act
+        timer.start()
+        watch(
+            self.static_dir,
+            self.content_dir,
+            self.template,
+            self.build_dir,
+            "/",
+            self.manifest,
+            self.render_cache,
+            interval=0.01,
+        )
+
+        # Assert
+        self.assertIs(handler, signal.getsignal(signal.SIGTERM))
+
+    def test_changed_files(self):
+        # Arrange
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+
+        # Act
+        changed, removed = changed_files(old, new)
+
+        # Assert
+        self.assertListEqual(["b", "d"], changed)
+        self.assertListEqual(["c"], removed)
+
+    def test_rebuild_renders_only_the_changed_page(self):
+        # Arrange
+        snapshot = self.snapshot()
+        self.write("content/blog/post.md", "# Post\n\nEdited **text**")
+
+        # Act
+        stats = self.rebuild(snapshot)
+
+        # Assert
+        self.assertEqual(1, stats["generated"])
+        self.assertEqual(0, stats["unchanged"])
+        self.assertIn(
+            "Edited <b>text</b>",
+            read_file(self.path("docs/blog/post.html")),
+        )
+
+    def test_rebuild_removes_the_output_of_a_removed_page(self):
+        # Arrange
+        snapshot = self.snapshot()
+        os.remove(self.path("content/blog/post.md"))
+
+        # Act
+        stats = self.rebuild(snapshot)
+
+        # Assert
+        self.assertEqual(1, stats["removed"])
+        self.assertEqual(0, stats["generated"])
+        self.assertFalse(os.path.exists(self.path("docs/blog")))
+
+    def test_rebuild_checks_everything_when_the_watcher_lost_track(self):
+        # Arrange
+        os.remove(self.path("content/blog/post.md"))
+        self.write("content/about.md", "# About\n\nUs")
+
+        # Act
+        stats = rebuild_changes(
+            None,
+            None,
+            self.static_dir,
+            self.content_dir,
+            self.template,
+            self.build_dir,
+            "/",
+            self.manifest,
+            self.render_cache,
+        )
+
+        # Assert
+        self.assertEqual(1, stats["generated"])
+        self.assertEqual(1, stats["removed"])
+        self.assertTrue(os.path.isfile(self.path("docs/about.html")))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "needs inotify")
+    def test_inotify_watcher_reports_changed_and_new_files(self):
+        # Arrange
+        watcher = InotifyWatcher(
+            (self.static_dir, self.content_dir, self.template)
+        )
+        self.addCleanup(watcher.close)
+        self.write("content/index.md", "# Home\n\nEdited")
+        self.write("content/new/page.md", "# New\n\nPage")
+        os.remove(self.path("static/index.css"))
+        self.write("unwatched.txt", "Not watched")
+
+        # Act
+        changed, removed = watcher.poll(1)
+        idle = watcher.poll(0)
+
+        # Assert
+        self.assertListEqual(
+            [self.path("content/index.md"), self.path("content/new/page.md")],
+            changed,
+        )
+        self.assertListEqual([self.path("static/index.css")], removed)
+        self.assertEqual(([], []), idle)
+
+    def test_rebuild_copies_and_deletes_static_files(self):
+        # Arrange
+        snapshot = self.snapshot()
+        self.write("static/images/logo.svg", "<svg/>")
+        os.remove(self.path("static/index.css"))
+
+        # Act
+        stats = self.rebuild(snapshot)
+
+        # Assert
+        self.assertEqual(1, stats["copied"])
+        self.assertEqual(1, stats["deleted"])
+        self.assertEqual(0, stats["generated"])
+        self.assertTrue(os.path.isfile(self.path("docs/images/logo.svg")))
+        self.assertFalse(os.path.exists(self.path("docs/index.css")))
+
+    def test_rebuild_renders_every_page_when_the_template_changes(self):
+        # Arrange
+        snapshot = self.snapshot()
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+
+        # Act
+        stats = self.rebuild(snapshot)
+
+        # Assert
+        self.assertEqual(2, stats["generated"])
+        self.assertTrue(
+            read_file(self.path("docs/index.html")).startswith("<h1>Home")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()